@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# ## ACS Notebook-Gold Layer Export
+#
+# New notebook
+
+# ### **Gold Layer Star Schema of 2022 ACS 5-Year Data for Power BI Import**
+# #### Introduction
+# This PySpark notebook reshapes the Bronze layer written by the "ACS Notebook-Bronze Layer ETL" notebook into a star schema sized for the Power BI VertiPaq engine. The Bronze tables are wide (one column per estimate, MOE and CV variable, plus the geometry text), which is convenient for ingestion but compresses poorly: every column gets its own dictionary and wide text columns defeat run-length encoding. Here we produce four Gold tables – DimGeography, DimVariable, DimVintage and a narrow FactACS – where the fact carries only integer surrogate keys and three numeric measures. The fact is written sorted by its lowest-cardinality keys first so that each column segment is made of long runs of repeated values, which is what VertiPaq (and V-Order in Fabric) compresses best. Optional state and county summary tables are also produced for Power BI aggregations, so most visuals never need to scan the tract-level fact.
+
+# In[ ]:
+
+
+from pyspark.sql import functions as F
+from pyspark.sql.window import Window
+
+ACS_DATASET = "acs/acs5"
+ACS_YEAR = 2022
+
+geographies = ["tract", "zcta", "county", "state"]
+
+# Geographic identifier column that the Bronze notebook sets as the index for each level
+GEO_ID_COLUMNS = {"tract": "GEOID", "zcta": "ZCTA", "county": "FIPS", "state": "state"}
+# Sort order of the levels in DimGeography (coarse to fine keeps related keys adjacent)
+GEO_LEVEL_ORDER = {"state": 1, "county": 2, "tract": 3, "zcta": 4}
+
+BUILD_SUMMARY_TABLES = True   # Also write the state/county summary tables for Power BI aggregations
+INCLUDE_GEOMETRY = False      # Geometry text is large and rarely needed in the model; kept in its own table when enabled
+CV_DECIMALS = 2               # Rounding CV to a fixed precision shrinks its dictionary considerably
+
+# Name of the area of interest used in the Bronze notebook (e.g. "harris_county"), or None for the
+# national run. Area runs read the area's Bronze tables and write their own suffixed Gold tables
+# (e.g. Gold.FactACS_harris_county), so a regional Gold run never overwrites the national one.
+AREA_OF_INTEREST_NAME = None
+TABLE_SUFFIX = f"_{AREA_OF_INTEREST_NAME}" if AREA_OF_INTEREST_NAME else ""
+
+def gold_table_name(name):
+    return f"Gold.{name}{TABLE_SUFFIX}"
+
+# Fabric applies V-Order (VertiPaq-friendly sorting/encoding) to Parquet files written with this setting
+spark.conf.set("spark.sql.parquet.vorder.enabled", "true")
+spark.sql("CREATE SCHEMA IF NOT EXISTS Gold")
+
+
+# **Step 1: DimVariable and DimVintage**
+# DimVariable is built from the Bronze.census_variable_reference table created at the end of the Bronze notebook. Only estimate variables (codes ending in "E") become rows; the matching MOE and CV values are stored as measures on the same fact row instead of as separate variables. The surrogate key is assigned in (table, variable code) order so that variables of the same ACS table get consecutive keys. DimVintage holds one row per ACS release; its key is the vintage year itself, which is already a small integer and stays stable across runs.
+
+# In[ ]:
+
+
+var_ref_df = spark.table("Bronze.census_variable_reference")
+
+dim_variable_df = (
+    var_ref_df
+        .filter(F.col("variable_code").endswith("E"))
+        .dropDuplicates(["variable_code"])
+        .withColumn("VariableKey", F.row_number().over(Window.orderBy("table", "variable_code")).cast("int"))
+        .select(
+            "VariableKey",
+            F.col("variable_code").alias("VariableCode"),
+            F.col("variable_label").alias("VariableLabel"),
+            F.col("table").alias("TableID"),
+            F.col("table_description").alias("TableDescription"),
+        )
+)
+dim_variable_df.write.format("delta").mode("overwrite").option("overwriteSchema", "true").saveAsTable(gold_table_name("DimVariable"))
+dim_variable_df = spark.table(gold_table_name("DimVariable"))
+
+dim_vintage_df = spark.createDataFrame(
+    [(ACS_YEAR, ACS_DATASET, ACS_YEAR - 4, ACS_YEAR, f"{ACS_YEAR - 4}-{ACS_YEAR} ACS 5-Year")],
+    "VintageKey int, Dataset string, PeriodStartYear int, PeriodEndYear int, VintageLabel string",
+)
+dim_vintage_df.write.format("delta").mode("overwrite").option("overwriteSchema", "true").saveAsTable(gold_table_name("DimVintage"))
+
+table_ids = sorted(row["TableID"] for row in dim_variable_df.select("TableID").distinct().collect())
+print(f"Variables in DimVariable: {dim_variable_df.count()} across {len(table_ids)} tables")
+
+
+# **Step 2: DimGeography**
+# Every Bronze table at a given level contains the same set of geographies, so the dimension is built from the identifier columns of the Bronze tables only (Delta reads just those columns). Each geography gets a GeoLevel, the code used as its natural key (11-digit tract GEOID, 5-digit ZCTA, 5-digit county FIPS or 2-digit state FIPS), its name and its parent state/county codes, which is what Power BI needs for slicing and drill-down. Keys are assigned level by level, coarse to fine, and by code within a level.
+
+# In[ ]:
+
+
+def bronze_table_name(table_id, geo):
+    return f"Bronze.census_acs{ACS_YEAR}_{table_id}_{geo}{TABLE_SUFFIX}"
+
+def existing_bronze_tables(geo):
+    """Return the curated table IDs that have a Bronze table for the given geography."""
+    return [t for t in table_ids if spark.catalog.tableExists(bronze_table_name(t, geo))]
+
+def geography_rows(geo):
+    """Distinct geographies of one level, taken from the first Bronze table available for it."""
+    available = existing_bronze_tables(geo)
+    if not available:
+        return None
+    df = spark.table(bronze_table_name(available[0], geo))
+    geo_id = GEO_ID_COLUMNS[geo]
+    # state/county are bigint on tract and county tables, so they are zero-padded back to FIPS codes
+    state_col = F.lpad(F.col("state").cast("string"), 2, "0") if "state" in df.columns else F.lit(None).cast("string")
+    county_col = F.lpad(F.col("county").cast("string"), 3, "0") if "county" in df.columns else F.lit(None).cast("string")
+    name_col = F.col("NAME") if "NAME" in df.columns else F.lit(None).cast("string")
+    cols = [
+        F.lit(geo).alias("GeoLevel"),
+        F.col(geo_id).cast("string").alias("GEOID"),
+        name_col.alias("GeographyName"),
+        state_col.alias("StateFIPS"),
+        county_col.alias("CountyFIPS"),
+    ]
+    if INCLUDE_GEOMETRY and "geometry_wkt" in df.columns:
+        cols.append(F.col("geometry_wkt"))
+    return df.select(*cols).dropDuplicates(["GEOID"])
+
+geo_frames = [df for df in (geography_rows(g) for g in geographies) if df is not None]
+if not geo_frames:
+    raise ValueError(f"No Bronze tables found for {bronze_table_name('<table>', '<geo>')}; run the Bronze notebook first.")
+all_geos_df = geo_frames[0]
+for df in geo_frames[1:]:
+    all_geos_df = all_geos_df.unionByName(df, allowMissingColumns=True)
+
+level_order = F.create_map(*[x for k, v in GEO_LEVEL_ORDER.items() for x in (F.lit(k), F.lit(v))])
+all_geos_df = all_geos_df.withColumn(
+    "GeographyKey",
+    F.row_number().over(Window.orderBy(level_order[F.col("GeoLevel")], "GEOID")).cast("int"),
+)
+
+dim_geography_df = all_geos_df.select("GeographyKey", "GeoLevel", "GEOID", "GeographyName", "StateFIPS", "CountyFIPS")
+dim_geography_df.write.format("delta").mode("overwrite").option("overwriteSchema", "true").saveAsTable(gold_table_name("DimGeography"))
+dim_geography_df = spark.table(gold_table_name("DimGeography"))
+
+if INCLUDE_GEOMETRY and "geometry_wkt" in all_geos_df.columns:
+    (all_geos_df.select("GeographyKey", "geometry_wkt")
+        .filter(F.col("geometry_wkt").isNotNull())
+        .write.format("delta").mode("overwrite").option("overwriteSchema", "true")
+        .saveAsTable(gold_table_name("DimGeographyShape")))
+
+print(f"Geographies in DimGeography: {dim_geography_df.count()}")
+
+
+# **Step 3: Narrow FactACS**
+# Each wide Bronze table is unpivoted with a single `stack` expression that emits one row per (geography, estimate variable) carrying the estimate, its MOE and its CV side by side, so no shuffle or pivot is needed. The natural keys are then replaced with the integer surrogate keys via broadcast joins against the two dimensions. The resulting fact has six model columns: VintageKey, GeographyKey, VariableKey, Estimate, MOE and CV. Rows without an estimate are dropped. The Delta table is partitioned by GeoLevel, so each geography level lives in its own folder and Power BI can refresh one import partition per level (see Additional files/powerbi_model_generator.py) without scanning the other levels; GeoLevel is constant within each file and is left out of the model. Before writing, the data is range-partitioned on VariableKey and sorted by (VintageKey, VariableKey, GeographyKey) within each file, so every Parquet row group holds long runs of identical keys that compress to almost nothing under run-length encoding.
+
+# In[ ]:
+
+
+def unpivot_bronze_table(table_id, geo):
+    """Unpivot one wide Bronze table into (GeoLevel, GEOID, VariableCode, Estimate, MOE, CV) rows."""
+    df = spark.table(bronze_table_name(table_id, geo))
+    estimate_cols = [c for c in df.columns if c.startswith(table_id + "_") and c.endswith("E")]
+    if not estimate_cols:
+        return None
+    stack_args = []
+    for est_var in estimate_cols:
+        moe_var = est_var[:-1] + "M"
+        cv_var = f"{est_var}_CV"
+        moe_expr = f"CAST(`{moe_var}` AS DOUBLE)" if moe_var in df.columns else "CAST(NULL AS DOUBLE)"
+        cv_expr = f"CAST(`{cv_var}` AS DOUBLE)" if cv_var in df.columns else "CAST(NULL AS DOUBLE)"
+        stack_args += [f"'{est_var}'", f"CAST(`{est_var}` AS DOUBLE)", moe_expr, cv_expr]
+    stack_expr = f"stack({len(estimate_cols)}, {', '.join(stack_args)}) AS (VariableCode, Estimate, MOE, CV)"
+    return (
+        df.select(F.lit(geo).alias("GeoLevel"), F.col(GEO_ID_COLUMNS[geo]).cast("string").alias("GEOID"), F.expr(stack_expr))
+          .filter(F.col("Estimate").isNotNull())
+    )
+
+long_frames = []
+for table_id in table_ids:
+    for geo in geographies:
+        if not spark.catalog.tableExists(bronze_table_name(table_id, geo)):
+            continue
+        long_df = unpivot_bronze_table(table_id, geo)
+        if long_df is not None:
+            long_frames.append(long_df)
+
+if not long_frames:
+    raise ValueError(f"No Bronze tables with estimate columns found for {bronze_table_name('<table>', '<geo>')}.")
+fact_long_df = long_frames[0]
+for df in long_frames[1:]:
+    fact_long_df = fact_long_df.unionByName(df)
+
+fact_acs_df = (
+    fact_long_df
+        .join(F.broadcast(dim_variable_df.select("VariableKey", "VariableCode")), on="VariableCode", how="inner")
+        .join(F.broadcast(dim_geography_df.select("GeographyKey", "GeoLevel", "GEOID")), on=["GeoLevel", "GEOID"], how="inner")
+        .select(
+            F.lit(ACS_YEAR).cast("int").alias("VintageKey"),
+            "GeoLevel",
+            "GeographyKey",
+            "VariableKey",
+            "Estimate",
+            "MOE",
+            F.round("CV", CV_DECIMALS).alias("CV"),
+        )
+        .repartitionByRange("GeoLevel", "VintageKey", "VariableKey")
+        .sortWithinPartitions("VintageKey", "VariableKey", "GeographyKey")
+)
+(fact_acs_df.write.format("delta").mode("overwrite").option("overwriteSchema", "true")
+    .partitionBy("GeoLevel")
+    .saveAsTable(gold_table_name("FactACS")))
+print(f"Rows in FactACS: {spark.table(gold_table_name('FactACS')).count()}")
+
+
+# **Step 4: Optional State and County Summary Tables**
+# For Power BI aggregations (or simply for report pages that never go below county), we also write FactACS_StateSummary and FactACS_CountySummary. They are taken from the Census-published state and county estimates already present in FactACS rather than by summing tracts, because medians, ratios and margins of error are not additive. Each summary row is keyed by the same GeographyKey/VariableKey as the fact and carries the state (and county) FIPS codes plus the number of tracts in the area, so a composite model can map tract-level slicers onto the summary grain.
+
+# In[ ]:
+
+
+if BUILD_SUMMARY_TABLES:
+    fact_acs_df = spark.table(gold_table_name("FactACS"))
+    tract_counts_df = (
+        dim_geography_df.filter(F.col("GeoLevel") == "tract")
+            .groupBy("StateFIPS", "CountyFIPS").agg(F.count("*").cast("int").alias("TractCount"))
+    )
+
+    for level, summary_name, count_keys in [
+        ("state", gold_table_name("FactACS_StateSummary"), ["StateFIPS"]),
+        ("county", gold_table_name("FactACS_CountySummary"), ["StateFIPS", "CountyFIPS"]),
+    ]:
+        level_geos_df = dim_geography_df.filter(F.col("GeoLevel") == level).select("GeographyKey", *count_keys)
+        level_counts_df = tract_counts_df.groupBy(*count_keys).agg(F.sum("TractCount").cast("int").alias("TractCount"))
+        summary_df = (
+            fact_acs_df
+                .filter(F.col("GeoLevel") == level)   # reads only that level's FactACS partition
+                .join(F.broadcast(level_geos_df), on="GeographyKey", how="inner")
+                .join(F.broadcast(level_counts_df), on=count_keys, how="left")
+                .select("VintageKey", "GeographyKey", *count_keys, "VariableKey", "Estimate", "MOE", "CV", "TractCount")
+                .repartitionByRange("VintageKey", "VariableKey")
+                .sortWithinPartitions("VintageKey", "VariableKey", "GeographyKey")
+        )
+        summary_df.write.format("delta").mode("overwrite").option("overwriteSchema", "true").saveAsTable(summary_name)
+        print(f"Saved {level} summary to Gold layer as {summary_name}")
+
+# The Gold tables can now be imported into Power BI (or read in Direct Lake mode) with relationships
+# FactACS[GeographyKey] -> DimGeography, FactACS[VariableKey] -> DimVariable and FactACS[VintageKey] -> DimVintage.
@@ -6,6 +6,10 @@ from tqdm import tqdm
 import time
 import os
 import re
+import json
+import hashlib
+
+from acs_workbook_snapshot import load_workbook_sheet
 
 # --- Configuration ---
 ACS_YEAR = 2022
@@ -14,11 +18,24 @@ MAX_VARS_PER_CALL = 50
 RETRY_LIMIT = 3
 WAIT_BETWEEN_RETRIES = 2
 
+# Optional area of interest: None pulls the whole nation, otherwise only the geographies of the area
+# are downloaded and the outputs go to a folder named after it, e.g.
+# from acs_area_of_interest import AreaOfInterest
+# AREA_OF_INTEREST = AreaOfInterest(counties=["48201"], name="harris_county")
+AREA_OF_INTEREST = None
+OUTPUT_DIR = os.getcwd()
+if AREA_OF_INTEREST is not None:
+    AREA_OF_INTEREST.resolve(ACS_YEAR)
+    OUTPUT_DIR = os.path.join(OUTPUT_DIR, AREA_OF_INTEREST.name)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    print(f"Area of interest '{AREA_OF_INTEREST.name}': states {AREA_OF_INTEREST.states()}, {len(AREA_OF_INTEREST.zctas)} ZCTAs")
+
 # --- Step 1: Load curated table list and variable list ---
 excel_path = r"C:\Users\benha\OneDrive\Projects\Census Bureau\acs5_2022_variables_FINAL.xlsx"
 csv_path = r"C:\Users\benha\OneDrive\Projects\Census Bureau\acs5_2022_variables_filtered.csv"
 
-tables_df = pd.read_excel(excel_path, sheet_name="Tables_Curated")
+# Read through the compiled snapshot; the workbook is only parsed again when it changes
+tables_df = load_workbook_sheet(excel_path, "Tables_Curated")
 table_list = tables_df["table"].astype(str).unique().tolist()
 print(f"Loaded {len(table_list)} ACS tables. Example: {table_list[:5]}")
 
@@ -49,7 +66,13 @@ def fetch_data_chunk(variable_list, geo_level):
     else:
         raise ValueError("Unsupported geography level.")
     
-    df = ced.download(DATASET, ACS_YEAR, variable_list, **query_params, with_geometry=True)
+    if AREA_OF_INTEREST is None:
+        df = ced.download(DATASET, ACS_YEAR, variable_list, **query_params, with_geometry=True)
+    else:
+        # One call per selector of the area (e.g. state=48, county=201) instead of the nationwide '*'
+        parts = [ced.download(DATASET, ACS_YEAR, variable_list, **params, with_geometry=True)
+                 for params in AREA_OF_INTEREST.selectors(geo_level)]
+        df = AREA_OF_INTEREST.clip(pd.concat(parts))
     
     # Standardize ID columns for join and output
     if geo_level == "tract":
@@ -79,6 +102,46 @@ def fetch_data_chunk(variable_list, geo_level):
     
     return df
 
+# --- Content fingerprints for idempotent re-runs ---
+# Each output file gets a sidecar (<file>.fingerprint.json) with one fingerprint per state partition,
+# computed from the GEOID-sorted data, so an unchanged re-run does not rewrite the file.
+SCHEMA_KEY = "__schema__"
+UNPARTITIONED_KEY = "__all__"
+
+def content_fingerprints(df):
+    """SHA-256 of the sorted data per state partition, plus a fingerprint of the column layout."""
+    frame = df.sort_index()
+    frame = pd.DataFrame(frame[sorted(frame.columns)])
+    if "geometry" in frame.columns:
+        frame["geometry"] = frame["geometry"].apply(lambda geom: geom.wkb_hex if geom is not None else None)
+    if "state" in frame.columns:
+        partition_keys = frame["state"].astype(str)
+    elif frame.index.name == "state":
+        partition_keys = pd.Series(frame.index.astype(str), index=frame.index)
+    else:
+        partition_keys = pd.Series(UNPARTITIONED_KEY, index=frame.index)
+    fingerprints = {
+        str(key): hashlib.sha256(pd.util.hash_pandas_object(part, index=True).values.tobytes()).hexdigest()
+        for key, part in frame.groupby(partition_keys.values, sort=True)
+    }
+    fingerprints[SCHEMA_KEY] = hashlib.sha256(
+        json.dumps([frame.index.name] + [f"{c}:{t}" for c, t in frame.dtypes.astype(str).items()]).encode()
+    ).hexdigest()
+    return fingerprints
+
+def changed_partitions(output_file, fingerprints):
+    """Partitions whose fingerprint differs from the sidecar (all of them if the file or sidecar is missing)."""
+    sidecar = output_file + ".fingerprint.json"
+    if not (os.path.exists(output_file) and os.path.exists(sidecar)):
+        return sorted(fingerprints)
+    with open(sidecar, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+    return sorted(k for k in set(fingerprints) | set(previous) if fingerprints.get(k) != previous.get(k))
+
+def write_fingerprints(output_file, fingerprints):
+    with open(output_file + ".fingerprint.json", "w", encoding="utf-8") as f:
+        json.dump(fingerprints, f, indent=2, sort_keys=True)
+
 # --- Step 3: Loop through tables and geographies ---
 for table_id in tqdm(table_list, desc="Downloading ACS data by table"):
     table_vars = vars_final[vars_final["table"] == table_id]["VARIABLE"].tolist()
@@ -91,6 +154,8 @@ for table_id in tqdm(table_list, desc="Downloading ACS data by table"):
         continue
     
     for geo in geographies:
+        if AREA_OF_INTEREST is not None and not AREA_OF_INTEREST.selectors(geo):
+            continue
         geo_gdf = None
         for i in range(0, len(variables_all), MAX_VARS_PER_CALL):
             chunk_vars = variables_all[i:i+MAX_VARS_PER_CALL]
@@ -113,7 +178,13 @@ for table_id in tqdm(table_list, desc="Downloading ACS data by table"):
             if var in geo_gdf.columns and moe_var in geo_gdf.columns:
                 geo_gdf[var + "_CV"] = (geo_gdf[moe_var] / 1.645) / geo_gdf[var] * 100.0
         
-        # Save to Parquet
-        output_file = f"acs5_{ACS_YEAR}_{table_id}_{geo}.parquet"
+        # Save to Parquet, skipping the write when the content is unchanged since the last run
+        output_file = os.path.join(OUTPUT_DIR, f"acs5_{ACS_YEAR}_{table_id}_{geo}.parquet")
+        fingerprints = content_fingerprints(geo_gdf)
+        changed = changed_partitions(output_file, fingerprints)
+        if not changed:
+            print(f"Unchanged {geo} data for table {table_id}, kept {output_file}")
+            continue
         geo_gdf.to_parquet(output_file)
-        print(f"Saved {geo} data for table {table_id} to {output_file}")
+        write_fingerprints(output_file, fingerprints)
+        print(f"Saved {geo} data for table {table_id} to {output_file} ({len(changed)} changed partitions)")
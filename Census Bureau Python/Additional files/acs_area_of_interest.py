@@ -0,0 +1,169 @@
+"""
+Area-of-Interest Extraction Mode
+--------------------------------
+- Describes a regional deployment by states, counties, CBSAs and/or a bounding polygon
+- Resolves it to the minimal set of Census API geography selectors per level instead of
+  nationwide '*' selectors (e.g. Harris County, TX -> state='48', county='201', tract='*')
+- ZCTAs are selected through the cached Census ZCTA-to-county relationship file, CBSAs through
+  the cached OMB delineation file and polygons through cached county boundaries
+- clip() drops downloaded geographies that fall outside a polygon, so geometry and outputs
+  only contain the area that is used
+
+Usage:
+    from acs_area_of_interest import AreaOfInterest
+    aoi = AreaOfInterest(counties=["48201"], name="harris_county").resolve()
+    for params in aoi.selectors("tract"):
+        df = ced.download(ACS5, 2022, variables, **params, with_geometry=True)
+"""
+import os
+
+import pandas as pd
+
+# --- Configuration ---
+ACS_VINTAGE = 2022
+CACHE_DIR = os.environ.get("ACS_GEO_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "_geo_cache"))
+ZCTA_COUNTY_URL = "https://www2.census.gov/geo/docs/maps-data/data/rel2020/zcta520/tab20_zcta520_county20_natl.txt"
+CBSA_DELINEATION_URL = "https://www2.census.gov/programs-surveys/metro-micro/geographies/reference-files/2023/delineation-files/list1_2023.xlsx"
+MAX_CODES_PER_CALL = 100   # keeps long ZCTA/county lists within API URL limits
+
+
+def _cached_file(url, file_name):
+    """Download a reference file once into CACHE_DIR and return its local path."""
+    path = os.path.join(CACHE_DIR, file_name)
+    if not os.path.exists(path):
+        import requests
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        response = requests.get(url, timeout=120)
+        response.raise_for_status()
+        with open(path + ".tmp", "wb") as f:
+            f.write(response.content)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def zcta_county_relationships():
+    """ZCTA to county relationship pairs (2020 ZCTAs), cached as Parquet after the first download."""
+    parquet_path = os.path.join(CACHE_DIR, "zcta520_county20.parquet")
+    if not os.path.exists(parquet_path):
+        rel = pd.read_csv(_cached_file(ZCTA_COUNTY_URL, os.path.basename(ZCTA_COUNTY_URL)), sep="|", dtype=str)
+        rel = rel[["GEOID_ZCTA5_20", "GEOID_COUNTY_20"]].dropna().drop_duplicates()
+        rel.columns = ["ZCTA", "county_fips"]
+        rel.to_parquet(parquet_path, index=False)
+    return pd.read_parquet(parquet_path)
+
+
+def cbsa_counties():
+    """CBSA code to 5-digit county FIPS pairs from the OMB delineation file, cached as Parquet."""
+    parquet_path = os.path.join(CACHE_DIR, "cbsa_counties.parquet")
+    if not os.path.exists(parquet_path):
+        xlsx_path = _cached_file(CBSA_DELINEATION_URL, os.path.basename(CBSA_DELINEATION_URL))
+        delineation = pd.read_excel(xlsx_path, skiprows=2, dtype=str).dropna(subset=["FIPS County Code"])
+        pairs = pd.DataFrame({
+            "cbsa": delineation["CBSA Code"],
+            "county_fips": delineation["FIPS State Code"].str.zfill(2) + delineation["FIPS County Code"].str.zfill(3),
+        })
+        pairs.to_parquet(parquet_path, index=False)
+    return pd.read_parquet(parquet_path)
+
+
+def county_boundaries(vintage=ACS_VINTAGE):
+    """County boundaries (GeoDataFrame with a 5-digit 'county_fips' column), downloaded once via censusdis."""
+    import geopandas as gpd
+    parquet_path = os.path.join(CACHE_DIR, f"county_boundaries_{vintage}.parquet")
+    if not os.path.exists(parquet_path):
+        import censusdis.data as ced
+        from censusdis.datasets import ACS5
+        counties = ced.download(ACS5, vintage, ["NAME"], state="*", county="*", with_geometry=True)
+        cols = {c.lower(): c for c in counties.columns}
+        counties["county_fips"] = counties[cols["state"]].astype(str).str.zfill(2) + counties[cols["county"]].astype(str).str.zfill(3)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        counties[["county_fips", "geometry"]].to_parquet(parquet_path, index=False)
+    return gpd.read_parquet(parquet_path)
+
+
+def _chunks(values, size=MAX_CODES_PER_CALL):
+    values = sorted(values)
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+class AreaOfInterest:
+    """
+    A regional subset of the nation. Any combination of:
+    - states:   2-digit state FIPS codes (whole states)
+    - counties: 5-digit county FIPS codes
+    - cbsas:    5-digit CBSA codes (expanded to their counties)
+    - polygon:  shapely geometry or WKT in lon/lat (counties it touches, then clipped)
+    Call resolve() once before using selectors()/clip().
+    """
+
+    def __init__(self, states=None, counties=None, cbsas=None, polygon=None, name=None):
+        self.states_requested = sorted({str(s).zfill(2) for s in (states or [])})
+        self.counties_requested = sorted({str(c).zfill(5) for c in (counties or [])})
+        self.cbsas = sorted({str(c) for c in (cbsas or [])})
+        if isinstance(polygon, str):
+            from shapely import wkt
+            polygon = wkt.loads(polygon)
+        self.polygon = polygon
+        self.name = name or "aoi"
+        self.whole_states = set()
+        self.county_map = {}   # state FIPS -> set of 3-digit county codes (partial states only)
+        self.zctas = set()
+        self.resolved = False
+
+    def resolve(self, vintage=ACS_VINTAGE):
+        """Expand CBSAs/polygons to counties and find the intersecting ZCTAs."""
+        counties = set(self.counties_requested)
+        if self.cbsas:
+            pairs = cbsa_counties()
+            counties |= set(pairs.loc[pairs["cbsa"].isin(self.cbsas), "county_fips"])
+        if self.polygon is not None:
+            boundaries = county_boundaries(vintage)
+            counties |= set(boundaries.loc[boundaries.intersects(self.polygon), "county_fips"])
+        if not (self.states_requested or counties):
+            raise ValueError("Area of interest is empty: give states, counties, cbsas or a polygon.")
+
+        self.whole_states = set(self.states_requested)
+        self.county_map = {}
+        for fips in counties:
+            if fips[:2] not in self.whole_states:
+                self.county_map.setdefault(fips[:2], set()).add(fips[2:])
+
+        rel = zcta_county_relationships()
+        in_area = rel["county_fips"].str[:2].isin(self.whole_states) | rel["county_fips"].isin(counties)
+        self.zctas = set(rel.loc[in_area, "ZCTA"])
+        self.resolved = True
+        return self
+
+    def states(self):
+        """All state FIPS codes touched by the area."""
+        return sorted(self.whole_states | set(self.county_map))
+
+    def selectors(self, geo_level, state="*"):
+        """
+        Census API selectors (censusdis download keyword arguments) covering the area at a level,
+        optionally restricted to one state shard.
+        """
+        if not self.resolved:
+            raise RuntimeError("Call resolve() before selectors().")
+        whole = sorted(s for s in self.whole_states if state in ("*", s))
+        partial = {s: c for s, c in sorted(self.county_map.items()) if state in ("*", s)}
+        if geo_level == "state":
+            return [dict(state=codes) for codes in _chunks(whole + list(partial))] if (whole or partial) else []
+        if geo_level == "county":
+            params = [dict(state=codes, county="*") for codes in _chunks(whole)] if whole else []
+            params += [dict(state=s, county=codes) for s, c in partial.items() for codes in _chunks(c)]
+            return params
+        if geo_level == "tract":
+            params = [dict(state=s, county="*", tract="*") for s in whole]
+            params += [dict(state=s, county=codes, tract="*") for s, c in partial.items() for codes in _chunks(c)]
+            return params
+        if geo_level == "zcta":
+            # ZCTAs do not nest in states, so the state shard does not apply
+            return [dict(zip_code_tabulation_area=codes) for codes in _chunks(self.zctas)]
+        raise ValueError(f"Unsupported geography: {geo_level}")
+
+    def clip(self, gdf):
+        """Keep only rows whose geometry intersects the polygon (no-op without a polygon or geometry)."""
+        if self.polygon is None or "geometry" not in getattr(gdf, "columns", []):
+            return gdf
+        return gdf[gdf["geometry"].intersects(self.polygon)]
@@ -0,0 +1,304 @@
+"""
+ACS Variable Label Hierarchy Index
+----------------------------------
+- ACS labels encode a tree with '!!' separators, e.g. 'Estimate!!Total:!!Male:!!Under 5 years'
+  (the data.census.gov CSV exports encode the same tree with indentation instead)
+- LabelHierarchy parses the tree once per table and vintage into flat numpy arrays:
+    parent / depth arrays, nodes stored in preorder (Euler tour) with subtree end positions,
+    and a preorder list of leaves with prefix counts
+- Queries without string scans:
+    is_descendant(a, b)  O(1)     descendants(code)  O(k)
+    ancestors(code)      O(depth) leaves(code)       O(k)
+- check_additivity() verifies that children sum to their parent across a whole extracted
+  DataFrame (one column per variable) with a single matrix product
+
+Usage:
+    from acs_label_hierarchy import hierarchy_for
+    tree = hierarchy_for("B01001")
+    male_leaves = tree.leaves("B01001_002E")
+    violations = tree.check_additivity(geo_df)
+"""
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# --- Configuration ---
+ACS_VINTAGE = 2022
+INDEX_DIR = os.environ.get("ACS_HIERARCHY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "_hierarchy_index"))
+LABEL_SEPARATOR = "!!"
+ESTIMATE_PATTERN = re.compile(r"^[A-Z]+\d+[A-Z]*_\d+E$")
+JAM_VALUE_LIMIT = -111111111   # Census annotation values (-666666666, -999999999, ...) are not data
+INDENT_CHARS = "\u00a0 "   # data.census.gov exports indent labels with non-breaking spaces
+INDENT_WIDTH = 4
+
+
+def label_path(label):
+    """Split a Census label into its tree path, dropping the 'Estimate' prefix and trailing colons."""
+    parts = [p.strip().rstrip(":").strip() for p in str(label).split(LABEL_SEPARATOR)]
+    if parts and parts[0].lower() == "estimate":
+        parts = parts[1:]
+    return tuple(p for p in parts if p)
+
+
+class LabelHierarchy:
+    """
+    Label tree of one ACS table. Nodes are stored in preorder, so the subtree of node i is the
+    contiguous range [i, end[i]). Nodes without a variable code are headers that only exist as
+    label prefixes (common in DP tables); they have code None.
+    """
+
+    def __init__(self, table_id, codes, names, parent):
+        self.table_id = table_id
+        self.codes = np.asarray(codes, dtype=object)
+        self.names = np.asarray(names, dtype=object)
+        self.parent = np.asarray(parent, dtype=np.int32)
+        n = len(self.parent)
+
+        self.depth = np.zeros(n, dtype=np.int32)
+        child_count = np.zeros(n, dtype=np.int32)
+        for i in range(n):
+            p = self.parent[i]
+            if p >= 0:
+                self.depth[i] = self.depth[p] + 1
+                child_count[p] += 1
+
+        # Subtree end (exclusive) of each preorder node: the next node at the same or a shallower depth
+        self.end = np.full(n, n, dtype=np.int32)
+        stack = []
+        for i in range(n):
+            while stack and self.depth[stack[-1]] >= self.depth[i]:
+                self.end[stack.pop()] = i
+            stack.append(i)
+
+        self.is_leaf = child_count == 0
+        self.leaf_nodes = np.flatnonzero(self.is_leaf).astype(np.int32)
+        self.leaf_prefix = np.concatenate([[0], np.cumsum(self.is_leaf)]).astype(np.int32)
+        self.position = {code: i for i, code in enumerate(self.codes) if code is not None}
+
+    # --- Construction ---
+    @classmethod
+    def from_variables(cls, table_id, variables_df, code_col="VARIABLE", label_col="LABEL"):
+        """Build the tree of one table from variable metadata (estimate variables only)."""
+        df = variables_df[variables_df[code_col].astype(str).str.match(ESTIMATE_PATTERN)]
+        if "table" in df.columns:
+            df = df[df["table"] == table_id]
+        df = df.sort_values(code_col)
+
+        # Variable numbers follow the tree order, so children are attached in code order
+        by_path = {}
+        children = {(): []}
+        for code, label in zip(df[code_col], df[label_col]):
+            path = label_path(label)
+            if not path or path in by_path:
+                continue
+            for depth in range(1, len(path) + 1):
+                prefix = path[:depth]
+                if prefix not in children:
+                    children[prefix] = []
+                    children[prefix[:-1]].append(prefix)
+            by_path[path] = code
+
+        codes, names, parent = [], [], []
+
+        def visit(path, parent_index):
+            index = len(codes)
+            codes.append(by_path.get(path))
+            names.append(path[-1])
+            parent.append(parent_index)
+            for child in children[path]:
+                visit(child, index)
+
+        for top in children[()]:
+            visit(top, -1)
+        return cls(table_id, codes, names, parent)
+
+    @classmethod
+    def from_indented_labels(cls, table_id, labels, variables_df=None, code_col="VARIABLE", label_col="LABEL"):
+        """
+        Build a tree from indented labels, as in the 'Label (Grouping)' column of data.census.gov
+        exports. With variable metadata, each row gets the estimate code whose label path matches.
+        """
+        code_of = {}
+        if variables_df is not None:
+            df = variables_df[variables_df[code_col].astype(str).str.match(ESTIMATE_PATTERN)]
+            df = df[df[code_col].astype(str).str.startswith(f"{table_id}_")]
+            for code, label in sorted(zip(df[code_col], df[label_col])):
+                code_of.setdefault(tuple(p.casefold() for p in label_path(label)), code)
+
+        codes, names, parent = [], [], []
+        stack = []   # (depth, index, path) of the open ancestors
+        for label in labels:
+            text = str(label)
+            stripped = text.lstrip(INDENT_CHARS)
+            depth = (len(text) - len(stripped)) // INDENT_WIDTH
+            while stack and stack[-1][0] >= depth:
+                stack.pop()
+            name = stripped.rstrip(":").strip()
+            path = (stack[-1][2] if stack else ()) + (name.casefold(),)
+            codes.append(code_of.get(path))
+            names.append(name)
+            parent.append(stack[-1][1] if stack else -1)
+            stack.append((depth, len(codes) - 1, path))
+        return cls(table_id, codes, names, parent)
+
+    @classmethod
+    def from_census_export_csv(cls, csv_path, table_id=None, variables_df=None):
+        """
+        Build a tree from a data.census.gov table export (e.g. ACSDP5Y2022.DP02-....csv), with codes
+        matched from variable metadata (the acs_research snapshot of the export's vintage by default).
+        """
+        export_df = pd.read_csv(csv_path, dtype=str, encoding="utf-8-sig")
+        product = os.path.basename(csv_path).split("-")[0]
+        table_id = table_id or product.split(".")[-1]
+        if variables_df is None:
+            from acs_research import load_variables
+            vintage = re.search(r"(\d{4})\.", product)
+            variables_df = load_variables(int(vintage.group(1)) if vintage else ACS_VINTAGE)
+        return cls.from_indented_labels(table_id, export_df.iloc[:, 0].tolist(), variables_df)
+
+    # --- Queries ---
+    def _index(self, node):
+        return self.position[node] if isinstance(node, str) else int(node)
+
+    def is_descendant(self, node, ancestor):
+        """True if node is strictly inside ancestor's subtree (O(1))."""
+        i, a = self._index(node), self._index(ancestor)
+        return a < i < self.end[a]
+
+    def descendants(self, node):
+        """Variable codes of all nodes below node, in table order (O(k))."""
+        i = self._index(node)
+        return [c for c in self.codes[i + 1:self.end[i]] if c is not None]
+
+    def children(self, node):
+        i = self._index(node)
+        below = np.arange(i + 1, self.end[i])
+        return [c for c in self.codes[below[self.parent[below] == i]] if c is not None]
+
+    def ancestors(self, node):
+        """Variable codes from the parent up to the root (O(depth))."""
+        result = []
+        p = self.parent[self._index(node)]
+        while p >= 0:
+            if self.codes[p] is not None:
+                result.append(self.codes[p])
+            p = self.parent[p]
+        return result
+
+    def leaves(self, node):
+        """Variable codes of the leaves under node, e.g. every age band under 'Male' (O(k))."""
+        i = self._index(node)
+        if self.is_leaf[i]:
+            return [self.codes[i]] if self.codes[i] is not None else []
+        leaf_range = self.leaf_nodes[self.leaf_prefix[i]:self.leaf_prefix[self.end[i]]]
+        return [c for c in self.codes[leaf_range] if c is not None]
+
+    def to_frame(self):
+        """The index as a DataFrame (one row per node, in preorder)."""
+        return pd.DataFrame({
+            "table": self.table_id,
+            "node": np.arange(len(self.codes), dtype=np.int32),
+            "variable": self.codes,
+            "name": self.names,
+            "parent": self.parent,
+            "depth": self.depth,
+            "subtree_end": self.end,
+            "is_leaf": self.is_leaf,
+        })
+
+    # --- Additivity checks ---
+    def _effective_children(self, i):
+        """Children with a variable code; header-only children are replaced by their own children."""
+        result = []
+        below = np.arange(i + 1, self.end[i])
+        for c in below[self.parent[below] == i]:
+            if self.codes[c] is not None:
+                result.append(c)
+            else:
+                result.extend(self._effective_children(c))
+        return result
+
+    def check_additivity(self, data_df, rel_tol=0.001, abs_tol=1.0):
+        """
+        Check that children sum to their parent for every row of a wide frame (one column per
+        estimate variable). Returns one row per parent with the number of rows checked/failing and
+        the largest absolute difference; rows with missing or annotated values are ignored.
+        """
+        nodes = [i for i, c in enumerate(self.codes) if c is not None and c in data_df.columns]
+        column_of = {node: j for j, node in enumerate(nodes)}
+        parents, incidence = [], []
+        for p in nodes:
+            kids = self._effective_children(p)
+            if kids and all(k in column_of for k in kids):
+                col = np.zeros(len(nodes))
+                col[[column_of[k] for k in kids]] = 1.0
+                parents.append(p)
+                incidence.append(col)
+        if not parents:
+            return pd.DataFrame(columns=["parent", "children", "rows_checked", "rows_failed", "max_abs_diff"])
+
+        # copy=True: under copy-on-write to_numpy() may return a read-only view of the frame
+        values = data_df[[self.codes[i] for i in nodes]].to_numpy(dtype=float, copy=True)
+        values[values <= JAM_VALUE_LIMIT] = np.nan
+        incidence = np.stack(incidence, axis=1)                   # variables x parents
+        valid = ~np.isnan(values)
+        child_sums = np.nan_to_num(values) @ incidence              # rows x parents
+        complete = (valid.astype(float) @ incidence) == incidence.sum(axis=0)
+        parent_values = values[:, [column_of[p] for p in parents]]
+        complete &= ~np.isnan(parent_values)
+
+        diff = np.abs(child_sums - np.nan_to_num(parent_values))
+        failed = complete & (diff > np.maximum(abs_tol, rel_tol * np.abs(np.nan_to_num(parent_values))))
+        return pd.DataFrame({
+            "parent": [self.codes[p] for p in parents],
+            "children": incidence.sum(axis=0).astype(int),
+            "rows_checked": complete.sum(axis=0),
+            "rows_failed": failed.sum(axis=0),
+            "max_abs_diff": np.where(complete, diff, 0.0).max(axis=0),
+        })
+
+    # --- Persistence ---
+    def save(self, path):
+        np.savez_compressed(
+            path, table_id=np.array(self.table_id), codes=self.codes.astype(str),
+            has_code=np.array([c is not None for c in self.codes]), names=self.names.astype(str), parent=self.parent,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            codes = [c if has else None for c, has in zip(data["codes"].tolist(), data["has_code"].tolist())]
+            return cls(str(data["table_id"]), codes, data["names"].tolist(), data["parent"])
+
+
+def build_hierarchies(variables_df, vintage=ACS_VINTAGE, index_dir=INDEX_DIR):
+    """Build and save the hierarchy of every table in a variable metadata frame."""
+    os.makedirs(index_dir, exist_ok=True)
+    hierarchies = {}
+    for table_id, table_vars in variables_df.groupby("table"):
+        tree = LabelHierarchy.from_variables(table_id, table_vars)
+        tree.save(os.path.join(index_dir, f"acs5_{vintage}_{table_id}.npz"))
+        hierarchies[table_id] = tree
+    return hierarchies
+
+
+@lru_cache(maxsize=None)
+def hierarchy_for(table_id, vintage=ACS_VINTAGE, index_dir=INDEX_DIR):
+    """Hierarchy of one table, loaded from the saved index or built from the acs_research snapshot."""
+    path = os.path.join(index_dir, f"acs5_{vintage}_{table_id}.npz")
+    if os.path.exists(path):
+        return LabelHierarchy.load(path)
+    from acs_research import load_variables
+    tree = LabelHierarchy.from_variables(table_id, load_variables(vintage))
+    os.makedirs(index_dir, exist_ok=True)
+    tree.save(path)
+    return tree
+
+
+if __name__ == "__main__":
+    from acs_research import load_variables
+    built = build_hierarchies(load_variables(ACS_VINTAGE))
+    print(f"Built label hierarchies for {len(built)} tables in {INDEX_DIR}")
@@ -0,0 +1,192 @@
+"""
+Memory-Mapped Columnar Local Store
+----------------------------------
+- Converts the per table x geo Parquet outputs (acs5_{year}_{table}_{geo}.parquet) into an
+  Arrow IPC (Feather v2, uncompressed) store that is opened memory-mapped
+- Every file of a geo level shares one GEOID-sorted row order, kept in a small index file,
+  so the row of a geography is the same position in every table file
+- manifest.json holds the variable -> file/column directory
+- Reads of any variable subset for a GEOID range or prefix (e.g. all tracts of Harris County,
+  '48201') are zero-copy slices of the mapped files; arbitrary GEOID lists copy only those rows
+
+Layout:
+    store/manifest.json
+    store/{geo}__index.arrow       GEOID (sorted), NAME
+    store/{geo}__geometry.arrow    geometry as WKB (if present in the source)
+    store/{geo}__{table}.arrow     estimate / MOE / CV columns of one table
+
+Usage:
+    python acs_local_store.py --source . --store ./acs_store
+    store = LocalStore("./acs_store")
+    df = store.read("tract", ["B19013_001E", "B01003_001E"], geoid_prefix="48201").to_pandas()
+"""
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+# --- Configuration ---
+ACS_YEAR = 2022
+GEO_ID_COLUMNS = {"tract": "GEOID", "zcta": "ZCTA", "county": "FIPS", "state": "state"}
+NON_VARIABLE_COLUMNS = {"NAME", "geometry", "state", "county", "tract", "GEOID", "ZCTA", "FIPS", "__index_level_0__"}
+MANIFEST_NAME = "manifest.json"
+
+
+# --- Step 1: Build the store from the Parquet outputs ---
+def _write_arrow(table, path):
+    # Uncompressed so the mapped file can be used in place without decoding
+    tmp_path = path + ".tmp"
+    feather.write_feather(table, tmp_path, compression="uncompressed")
+    os.replace(tmp_path, path)
+
+
+def build_store(source_dir, store_dir, year=ACS_YEAR):
+    """Convert acs5_{year}_{table}_{geo}.parquet files in source_dir into a memory-mappable store."""
+    pattern = re.compile(rf"^acs5_{year}_(.+)_({'|'.join(GEO_ID_COLUMNS)})\.parquet$")
+    sources = {}
+    for entry in sorted(os.listdir(source_dir)):
+        match = pattern.match(entry)
+        if match:
+            sources.setdefault(match.group(2), {})[match.group(1)] = os.path.join(source_dir, entry)
+
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = {"year": year, "geos": {}}
+    for geo, tables in sources.items():
+        id_col = GEO_ID_COLUMNS[geo]
+
+        # Shared row order: every GEOID seen in any table of this level, sorted
+        ids = set()
+        names = {}
+        for path in tables.values():
+            cols = [c for c in (id_col, "NAME") if c in pq.read_schema(path).names]
+            part = pq.read_table(path, columns=cols).to_pydict()
+            ids.update(part[id_col])
+            if "NAME" in part:
+                names.update(zip(part[id_col], part["NAME"]))
+        geoids = np.array(sorted(str(i) for i in ids), dtype=object)
+        position = {g: i for i, g in enumerate(geoids)}
+        _write_arrow(
+            pa.table({"GEOID": pa.array(geoids, pa.string()), "NAME": pa.array([names.get(g) for g in geoids], pa.string())}),
+            os.path.join(store_dir, f"{geo}__index.arrow"),
+        )
+
+        geo_entry = {"rows": len(geoids), "index": f"{geo}__index.arrow", "geometry": None, "variables": {}}
+        for table_id, path in tables.items():
+            source = pq.read_table(path)
+            order = np.array([position[str(g)] for g in source.column(id_col).to_pylist()], dtype=np.int64)
+            # Scatter the source rows into the shared GEOID order (missing geographies stay null)
+            rows = np.full(len(geoids), -1, dtype=np.int64)
+            rows[order] = np.arange(len(order))
+            take = pa.array(rows, mask=rows < 0)
+
+            if "geometry" in source.column_names and geo_entry["geometry"] is None:
+                geometry_file = f"{geo}__geometry.arrow"
+                _write_arrow(pa.table({"geometry": source.column("geometry").take(take)}), os.path.join(store_dir, geometry_file))
+                geo_entry["geometry"] = geometry_file
+
+            variables = [c for c in source.column_names if c not in NON_VARIABLE_COLUMNS]
+            table_file = f"{geo}__{table_id}.arrow"
+            _write_arrow(
+                pa.table({c: source.column(c).cast(pa.float64()).take(take) for c in variables}),
+                os.path.join(store_dir, table_file),
+            )
+            for variable in variables:
+                geo_entry["variables"][variable] = table_file
+            print(f"Stored {table_id} {geo}: {len(variables)} variables")
+        manifest["geos"][geo] = geo_entry
+
+    with open(os.path.join(store_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+# --- Step 2: Memory-mapped reader ---
+class LocalStore:
+    """Read-only, memory-mapped access to a store built by build_store()."""
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self._mapped = {}
+        self._geoids = {}
+
+    def _open(self, file_name):
+        if file_name not in self._mapped:
+            source = pa.memory_map(os.path.join(self.store_dir, file_name), "r")
+            self._mapped[file_name] = pa.ipc.open_file(source).read_all()
+        return self._mapped[file_name]
+
+    def geos(self):
+        return sorted(self.manifest["geos"])
+
+    def variables(self, geo):
+        return sorted(self.manifest["geos"][geo]["variables"])
+
+    def geoids(self, geo):
+        """Sorted GEOIDs of a level as a numpy array (built once per level)."""
+        if geo not in self._geoids:
+            index = self._open(self.manifest["geos"][geo]["index"])
+            self._geoids[geo] = np.array(index.column("GEOID").to_pylist(), dtype=str)
+        return self._geoids[geo]
+
+    def _row_selection(self, geo, geoids=None, geoid_range=None, geoid_prefix=None):
+        """Return ('slice', start, stop) or ('take', positions) for the requested geographies."""
+        index = self.geoids(geo)
+        if geoid_prefix is not None:
+            upper = geoid_prefix[:-1] + chr(ord(geoid_prefix[-1]) + 1)
+            return "slice", int(np.searchsorted(index, geoid_prefix)), int(np.searchsorted(index, upper))
+        if geoid_range is not None:
+            low, high = geoid_range   # inclusive bounds
+            return "slice", int(np.searchsorted(index, low)), int(np.searchsorted(index, high, side="right"))
+        if geoids is not None:
+            wanted = np.unique(np.asarray(list(geoids), dtype=str))
+            positions = np.searchsorted(index, wanted)
+            found = positions < len(index)
+            positions, wanted = positions[found], wanted[found]
+            positions = positions[index[positions] == wanted]   # unknown GEOIDs are dropped
+            if len(positions) and positions[-1] - positions[0] + 1 == len(positions):
+                return "slice", int(positions[0]), int(positions[-1]) + 1
+            return "take", positions
+        return "slice", 0, len(index)
+
+    def read(self, geo, variables, geoids=None, geoid_range=None, geoid_prefix=None, with_name=True, with_geometry=False):
+        """
+        Read variables for a set of geographies as a pyarrow Table (GEOID first).
+        Select rows with one of: geoids (list), geoid_range ((low, high) inclusive) or geoid_prefix.
+        """
+        geo_entry = self.manifest["geos"][geo]
+        missing = [v for v in variables if v not in geo_entry["variables"]]
+        if missing:
+            raise KeyError(f"Variables not in the {geo} store: {missing[:10]}")
+
+        selection = self._row_selection(geo, geoids, geoid_range, geoid_prefix)
+
+        def rows(table):
+            if selection[0] == "slice":
+                return table.slice(selection[1], selection[2] - selection[1])   # zero-copy
+            return table.take(pa.array(selection[1]))
+
+        index = rows(self._open(geo_entry["index"]))
+        columns = {"GEOID": index.column("GEOID")}
+        if with_name:
+            columns["NAME"] = index.column("NAME")
+        for variable in variables:
+            columns[variable] = rows(self._open(geo_entry["variables"][variable]).select([variable])).column(0)
+        if with_geometry and geo_entry["geometry"]:
+            columns["geometry"] = rows(self._open(geo_entry["geometry"])).column("geometry")
+        return pa.table(columns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the memory-mapped ACS store from the extraction Parquet files.")
+    parser.add_argument("--source", default=os.getcwd(), help="Folder with acs5_{year}_{table}_{geo}.parquet files")
+    parser.add_argument("--store", default=os.path.join(os.getcwd(), "acs_store"))
+    parser.add_argument("--year", type=int, default=ACS_YEAR)
+    args = parser.parse_args()
+    build_store(args.source, args.store, args.year)
@@ -0,0 +1,265 @@
+"""
+Local Census API-Compatible Query Service
+-----------------------------------------
+- Serves /data/{year}/acs/acs5[/profile|/subject] requests from the local Bronze cache
+- Understands the Census API grammar: get= lists, group(), for= and in= clauses
+- Reads only the requested columns and geographies (column pruning + row filtering)
+- Returns the Census JSON array-of-arrays shape, so Power Query and Python callers can
+  point at http://localhost:8765 instead of https://api.census.gov without other changes
+
+The cache is the output of acs5_2022_extraction_all_geos.py (acs5_{year}_{table}_{geo}.parquet)
+or a copy of the Bronze Delta tables (census_acs{year}_{table}_{geo}/ folders with a _delta_log).
+
+Usage:
+    python acs_query_service.py --data-dir ./bronze --port 8765
+"""
+import argparse
+import json
+import os
+import re
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+# --- Configuration ---
+DATA_DIR = os.environ.get("ACS_BRONZE_DIR", os.getcwd())
+HOST = "127.0.0.1"
+PORT = 8765
+
+# Census API geography names mapped to the geo levels used by the Bronze outputs
+FOR_GEOGRAPHIES = {
+    "state": "state",
+    "county": "county",
+    "tract": "tract",
+    "zip code tabulation area": "zcta",
+}
+# Identifier column written as the index for each geo level, and the fixed-width parts it is made of
+GEO_ID_COLUMNS = {"tract": "GEOID", "zcta": "ZCTA", "county": "FIPS", "state": "state"}
+GEO_ID_PARTS = {
+    "tract": [("state", 2), ("county", 3), ("tract", 6)],
+    "county": [("state", 2), ("county", 3)],
+    "state": [("state", 2)],
+    "zcta": [("zip code tabulation area", 5)],
+}
+# Summary level prefixes used to build GEO_ID values for group() requests
+GEO_ID_PREFIXES = {"tract": "1400000US", "county": "0500000US", "state": "0400000US", "zcta": "860Z200US"}
+
+VARIABLE_PATTERN = re.compile(r"^([A-Z]+\d+[A-Z]*)_\d+[A-Z]*$")
+GROUP_PATTERN = re.compile(r"^group\(([A-Za-z0-9]+)\)$", re.IGNORECASE)
+
+
+class QueryError(ValueError):
+    """Raised for requests the Census API would reject; the message is returned as the 400 body."""
+
+
+# --- Step 1: Locate and open cached tables ---
+@lru_cache(maxsize=None)
+def open_dataset(year, table_id, geo):
+    """Return a pyarrow Dataset for one table x geo, or None if it is not in the cache."""
+    delta_dir = os.path.join(DATA_DIR, f"census_acs{year}_{table_id}_{geo}")
+    if os.path.isdir(os.path.join(delta_dir, "_delta_log")):
+        try:
+            from deltalake import DeltaTable
+        except ImportError as exc:
+            raise ImportError("Reading Delta tables requires the 'deltalake' package (pip install deltalake).") from exc
+        return DeltaTable(delta_dir).to_pyarrow_dataset()
+    parquet_file = os.path.join(DATA_DIR, f"acs5_{year}_{table_id}_{geo}.parquet")
+    if os.path.exists(parquet_file):
+        return ds.dataset(parquet_file, format="parquet")
+    return None
+
+
+@lru_cache(maxsize=None)
+def cached_tables(year, geo):
+    """List the table IDs available in the cache for a vintage and geo level."""
+    found = set()
+    parquet_pattern = re.compile(rf"^acs5_{year}_(.+)_{geo}\.parquet$")
+    delta_pattern = re.compile(rf"^census_acs{year}_(.+)_{geo}$")
+    for entry in os.listdir(DATA_DIR):
+        match = parquet_pattern.match(entry) or delta_pattern.match(entry)
+        if match:
+            found.add(match.group(1))
+    return tuple(sorted(found))
+
+
+def table_of(variable):
+    match = VARIABLE_PATTERN.match(variable)
+    return match.group(1) if match else None
+
+
+# --- Step 2: Parse the Census API query grammar ---
+def parse_get(get_value, year, geo):
+    """Expand the get= list into (output columns, {table_id: [columns]}, include GEO_ID)."""
+    outputs = []
+    by_table = {}
+    for item in [v.strip() for v in get_value.split(",") if v.strip()]:
+        group_match = GROUP_PATTERN.match(item)
+        if group_match:
+            table_id = group_match.group(1).upper()
+            dataset = open_dataset(year, table_id, geo)
+            if dataset is None:
+                raise QueryError(f"error: unknown/unsupported group '{table_id}'")
+            group_cols = [c for c in dataset.schema.names if table_of(c) == table_id and not c.endswith("_CV")]
+            for extra in ("GEO_ID", "NAME"):
+                if extra not in outputs:
+                    outputs.append(extra)
+            outputs.extend(group_cols)
+            by_table.setdefault(table_id, []).extend(group_cols)
+        elif item in ("NAME", "GEO_ID"):
+            outputs.append(item)
+        else:
+            table_id = table_of(item)
+            dataset = open_dataset(year, table_id, geo) if table_id else None
+            if dataset is None or item not in dataset.schema.names:
+                raise QueryError(f"error: unknown variable '{item}'")
+            outputs.append(item)
+            by_table.setdefault(table_id, []).append(item)
+    if not outputs:
+        raise QueryError("error: missing 'get' parameter")
+    return outputs, by_table
+
+
+def parse_predicates(for_value, in_values):
+    """Turn for=/in= clauses into (geo level, {Census geography name: [codes or '*']})."""
+    if not for_value:
+        raise QueryError("error: missing 'for' parameter")
+    for_name, _, for_codes = for_value.partition(":")
+    for_name = for_name.strip().lower()
+    if for_name not in FOR_GEOGRAPHIES:
+        raise QueryError(f"error: unknown/unsupported geography hierarchy '{for_name}'")
+    geo = FOR_GEOGRAPHIES[for_name]
+    selectors = {for_name: [c.strip() for c in (for_codes or "*").split(",")]}
+    # in= may be repeated or space-separated, e.g. "state:48 county:201"
+    for in_value in in_values:
+        for clause in re.findall(r"([a-z ]+?):([0-9*,]+)", in_value.strip().lower()):
+            name, codes = clause[0].strip(), clause[1]
+            if name not in [part for part, _ in GEO_ID_PARTS[geo]]:
+                raise QueryError(f"error: unknown/unsupported geography hierarchy '{name}' for '{for_name}'")
+            selectors[name] = [c.strip() for c in codes.split(",")]
+    return geo, selectors
+
+
+def geo_filter(geo, selectors):
+    """Build a pyarrow filter expression on the zero-padded identifier column, or None for everything."""
+    parts = GEO_ID_PARTS[geo]
+    id_field = ds.field(GEO_ID_COLUMNS[geo])
+    codes = [selectors.get(name, ["*"]) for name, _ in parts]
+    if all(c == ["*"] for c in codes):
+        return None
+    if all("*" not in c for c in codes):
+        # Fully specified geographies: exact match, which lets Parquet statistics skip row groups
+        values = [""]
+        for (_, width), part_codes in zip(parts, codes):
+            values = [v + code.zfill(width) for v in values for code in part_codes]
+        return id_field.isin(values)
+    pattern = "^" + "".join(
+        f".{{{width}}}" if "*" in part_codes else "(" + "|".join(re.escape(c.zfill(width)) for c in part_codes) + ")"
+        for (_, width), part_codes in zip(parts, codes)
+    ) + "$"
+    return pc.match_substring_regex(id_field, pattern=pattern)
+
+
+# --- Step 3: Read, join and format the response ---
+def format_value(value):
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if value != value:  # NaN
+            return None
+        return str(int(value)) if value.is_integer() else repr(value)
+    return str(value)
+
+
+def run_query(year, query):
+    """Answer a parsed query string dict with the Census API JSON array-of-arrays payload."""
+    in_values = query.get("in", [])
+    geo, selectors = parse_predicates(query.get("for", [""])[0], in_values)
+    outputs, by_table = parse_get(query.get("get", [""])[0], year, geo)
+    id_col = GEO_ID_COLUMNS[geo]
+    row_filter = geo_filter(geo, selectors)
+
+    # NAME comes from the first table read (or any cached table when only NAME/GEO_ID is requested)
+    if not by_table:
+        available = cached_tables(year, geo)
+        if not available:
+            raise QueryError(f"error: no cached data for geography '{geo}'")
+        by_table = {available[0]: []}
+
+    result = None
+    for table_id, columns in by_table.items():
+        dataset = open_dataset(year, table_id, geo)
+        wanted = [id_col] + list(dict.fromkeys(columns))
+        if result is None and "NAME" in dataset.schema.names:
+            wanted.append("NAME")
+        table = dataset.to_table(columns=wanted, filter=row_filter)
+        result = table if result is None else result.join(table, keys=id_col, join_type="left outer")
+    if result.num_rows == 0:
+        return None
+
+    result = result.sort_by(id_col)
+    ids = result.column(id_col).to_pylist()
+    data = {name: result.column(name).to_pylist() for name in result.schema.names if name != id_col}
+    if "GEO_ID" in outputs:
+        data["GEO_ID"] = [GEO_ID_PREFIXES[geo] + geo_id for geo_id in ids]
+
+    # Like the Census API, every level of the hierarchy is appended after the requested variables
+    geo_headers = []
+    geo_values = []
+    start = 0
+    for name, width in GEO_ID_PARTS[geo]:
+        geo_headers.append(name)
+        geo_values.append([geo_id[start:start + width] for geo_id in ids])
+        start += width
+
+    rows = [outputs + geo_headers]
+    for i in range(len(ids)):
+        rows.append([format_value(data[col][i]) for col in outputs] + [vals[i] for vals in geo_values])
+    return rows
+
+
+class CensusQueryHandler(BaseHTTPRequestHandler):
+    """HTTP handler for /data/{year}/acs/acs5... requests."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        match = re.match(r"^/data/(\d{4})/(acs/acs5(?:/[a-z]+)?)/?$", url.path)
+        if not match:
+            return self._send(404, "text/plain", f"error: unknown dataset path '{url.path}'")
+        try:
+            rows = run_query(int(match.group(1)), parse_qs(url.query, keep_blank_values=True))
+        except QueryError as exc:
+            return self._send(400, "text/plain", str(exc))
+        if rows is None:
+            return self._send(204, "text/plain", "")
+        return self._send(200, "application/json", json.dumps(rows, separators=(",", ":")))
+
+    def _send(self, status, content_type, body):
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+
+def serve(data_dir=DATA_DIR, host=HOST, port=PORT):
+    global DATA_DIR
+    DATA_DIR = data_dir
+    open_dataset.cache_clear()
+    cached_tables.cache_clear()
+    server = ThreadingHTTPServer((host, port), CensusQueryHandler)
+    print(f"Serving ACS data from {data_dir} at http://{host}:{port}/data/<year>/acs/acs5")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Census API-compatible query service over the local Bronze cache.")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Folder with acs5_{year}_{table}_{geo}.parquet files or Bronze Delta tables")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+    serve(args.data_dir, args.host, args.port)
@@ -0,0 +1,50 @@
+"""
+ACS 5-Year Variable Research Library
+------------------------------------
+Importable replacement for Metric_Research.py, acs_variable_research.py,
+acs_table_research.py and acs_variable_table_research.py.
+
+- Importing the package does no network calls, printing or file writes
+- The first call to a research helper loads the prebuilt Feather snapshot of the
+  variable/table metadata shipped in data/ (memory-mapped, uncompressed)
+- The Census API is only touched by an explicit refresh:
+      python -m acs_research refresh --vintage 2022
+  and the shipped snapshot can be rebuilt offline from the curated workbooks:
+      python -m acs_research seed
+
+Example:
+    from acs_research import search_variables, preview_table
+    search_variables("income", table_prefix="B", tract_only=True)
+"""
+from .export import export_csv
+from .search import (
+    prefix_summary,
+    preview_table,
+    search_variables,
+    table_summary,
+    variables_by_type,
+)
+from .snapshot import ACS_VINTAGE, load_tables, load_variables
+
+__all__ = [
+    "ACS_VINTAGE",
+    "export_csv",
+    "load_tables",
+    "load_variables",
+    "prefix_summary",
+    "preview_table",
+    "search_variables",
+    "table_summary",
+    "variables_by_type",
+    "variables_df",
+    "tables_df",
+]
+
+
+def __getattr__(name):
+    # variables_df / tables_df are kept for compatibility with the old scripts, loaded on first access
+    if name == "variables_df":
+        return load_variables()
+    if name == "tables_df":
+        return load_tables()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,57 @@
+"""
+Command line entry point for the research library.
+
+    python -m acs_research refresh [--vintage 2022]       # rebuild the snapshot from the Census API
+                                   [--no-resume]          # ignore the checkpoint of an interrupted refresh
+    python -m acs_research seed                           # rebuild the snapshot offline from the curated workbooks
+    python -m acs_research search income --prefix B      # keyword search
+    python -m acs_research preview B19013                 # list a table's variables
+    python -m acs_research export [--min-variables 3]     # write the CSV outputs of the old scripts
+"""
+import argparse
+
+from .export import export_csv
+from .search import MAX_RESULTS, preview_table, search_variables
+from .snapshot import ACS_VINTAGE, seed_snapshot
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="acs_research", description="ACS 5-year variable research tools.")
+    parser.add_argument("--vintage", type=int, default=ACS_VINTAGE)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    refresh = commands.add_parser("refresh", help="Rebuild the metadata snapshot from the Census API")
+    refresh.add_argument("--no-resume", action="store_true", help="Discard the checkpoint of an interrupted refresh")
+
+    commands.add_parser("seed", help="Rebuild the snapshot offline from the curated workbooks")
+
+    search = commands.add_parser("search", help="Search variable labels by keyword")
+    search.add_argument("keyword")
+    search.add_argument("--prefix", help="Table prefix: B, C, DP or S")
+    search.add_argument("--tract-only", action="store_true")
+    search.add_argument("--zcta-only", action="store_true")
+    search.add_argument("--limit", type=int, default=MAX_RESULTS)
+
+    preview = commands.add_parser("preview", help="List the variables of one table")
+    preview.add_argument("table")
+
+    export = commands.add_parser("export", help="Write the variable list and table summary CSVs")
+    export.add_argument("--min-variables", type=int, default=0)
+    export.add_argument("--output-dir")
+
+    args = parser.parse_args(argv)
+    if args.command == "refresh":
+        from .harvest import refresh_snapshot
+        refresh_snapshot(args.vintage, resume=not args.no_resume)
+    elif args.command == "seed":
+        seed_snapshot(args.vintage)
+    elif args.command == "search":
+        print(search_variables(args.keyword, args.prefix, args.tract_only, args.zcta_only, args.limit, args.vintage).to_string())
+    elif args.command == "preview":
+        print(preview_table(args.table, args.vintage).to_string())
+    elif args.command == "export":
+        export_csv(args.vintage, args.min_variables, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Append-only checkpoint of a metadata harvest.
+
+Each group's variables are written as soon as they arrive, as one immutable Parquet fragment
+(harvest_{vintage}/{group}.parquet next to the snapshot). Writing a group never touches the
+fragments already on disk, so checkpointing stays linear in the number of groups. A restarted
+refresh skips the groups that already have a fragment, and on completion the fragments are
+compacted into the snapshot once and removed.
+"""
+import os
+import shutil
+
+import pandas as pd
+
+from .snapshot import ACS_VINTAGE, SNAPSHOT_DIR
+
+# --- Configuration ---
+FRAGMENT_COLUMNS = ["table", "VARIABLE", "LABEL"]   # all that build_metadata() needs
+
+
+def checkpoint_dir(vintage=ACS_VINTAGE, snapshot_dir=None):
+    return os.path.join(snapshot_dir or SNAPSHOT_DIR, f"harvest_{vintage}")
+
+
+def persisted_groups(directory):
+    """Groups that already have a complete fragment (partially written .tmp files are ignored)."""
+    if not os.path.isdir(directory):
+        return set()
+    return {name[:-len(".parquet")] for name in os.listdir(directory) if name.endswith(".parquet")}
+
+
+def append_fragment(df, group, directory):
+    """Persist one group's variables as its own fragment (written atomically)."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{group}.parquet")
+    tmp_path = path + ".tmp"
+    df[FRAGMENT_COLUMNS].astype("string").to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def read_fragments(directory):
+    """All persisted fragments as one DataFrame, read in a single pass."""
+    paths = [os.path.join(directory, f"{group}.parquet") for group in sorted(persisted_groups(directory))]
+    if not paths:
+        return pd.DataFrame(columns=FRAGMENT_COLUMNS, dtype="string")
+    import pyarrow.parquet as pq
+    return pq.ParquetDataset(paths).read().to_pandas()
+
+
+def clear(directory):
+    """Drop the fragments once they have been compacted into the snapshot."""
+    shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,23 @@
+"""
+CSV exports matching the outputs of the original research scripts.
+"""
+import os
+
+from .search import table_summary
+from .snapshot import ACS_VINTAGE, load_variables
+
+
+def export_csv(vintage=ACS_VINTAGE, min_variables=0, output_dir=None):
+    """Write the variable list and table summary CSVs the research scripts used to produce."""
+    output_dir = output_dir or os.getcwd()
+    tables_df = table_summary(min_variables, vintage)
+    variables_df = load_variables(vintage)
+    variables_df = variables_df[variables_df["table"].isin(tables_df["table"])]
+
+    output_file_vars = os.path.join(output_dir, f"acs5_{vintage}_variables_filtered.csv")
+    variables_df.to_csv(output_file_vars, index=False)
+    print(f"Full variable list saved to: {output_file_vars}")
+
+    output_file_tables = os.path.join(output_dir, f"acs5_{vintage}_table_summary.csv")
+    tables_df.to_csv(output_file_tables, index=False)
+    print(f"Table-level summary saved to: {output_file_tables}")
@@ -0,0 +1,100 @@
+"""
+Census API harvesting used to rebuild the metadata snapshot.
+
+This is the only module that talks to the network, and it is only imported by the
+refresh entry point (python -m acs_research refresh).
+"""
+import time
+
+import pandas as pd
+import censusdis.data as ced
+from censusdis.datasets import ACS5
+from requests.exceptions import ReadTimeout
+from tqdm import tqdm
+
+from . import checkpoint
+from .snapshot import ACS_VINTAGE, build_metadata, write_snapshot
+
+# --- Configuration ---
+TABLE_PREFIXES = ("B", "C", "DP", "S")
+RETRY_LIMIT = 3
+WAIT_BETWEEN_RETRIES = 2
+
+
+def fetch_groups(vintage=ACS_VINTAGE):
+    """All ACS5 groups (tables) for a vintage, filtered to the relevant prefixes."""
+    groups_df = ced.variables.all_groups(ACS5, vintage)
+    return groups_df[groups_df["GROUP"].str.startswith(TABLE_PREFIXES)]
+
+
+def fetch_group_variables(group, vintage=ACS_VINTAGE):
+    """Download all variables of one group, retrying on API timeouts. Returns None if every retry failed."""
+    retries = RETRY_LIMIT
+    while retries > 0:
+        try:
+            df = ced.variables.all_variables(ACS5, vintage, group)
+            df["table"] = group
+            return df
+        except ReadTimeout:
+            retries -= 1
+            time.sleep(WAIT_BETWEEN_RETRIES)
+    return None
+
+
+def harvest_variables(groups, vintage=ACS_VINTAGE, checkpoint_dir=None):
+    """
+    Download the variables of every group (one API call per group). With a checkpoint_dir, each
+    group is persisted as a fragment on arrival, groups already persisted are not downloaded
+    again, and the result is read back from the fragments.
+    """
+    done = checkpoint.persisted_groups(checkpoint_dir) if checkpoint_dir else set()
+    if done:
+        print(f"Resuming harvest: {len(done)} groups already checkpointed in {checkpoint_dir}")
+    all_vars = []
+    failed = []
+    for group in tqdm([g for g in groups if g not in done], desc="Downloading ACS Variables"):
+        df = fetch_group_variables(group, vintage)
+        if df is None:
+            failed.append(group)
+        elif checkpoint_dir:
+            checkpoint.append_fragment(df, group, checkpoint_dir)
+        else:
+            all_vars.append(df)
+    if failed:
+        print(f"Skipped {len(failed)} groups after {RETRY_LIMIT} timeouts: {failed[:10]}")
+    if checkpoint_dir:
+        raw_vars_df = checkpoint.read_fragments(checkpoint_dir)
+        return raw_vars_df[raw_vars_df["table"].isin(groups)].reset_index(drop=True), failed
+    return pd.concat(all_vars, ignore_index=True), failed
+
+
+def refresh_snapshot(vintage=ACS_VINTAGE, snapshot_dir=None, resume=True):
+    """
+    Rebuild the metadata snapshot for a vintage from the Census API. Downloaded groups are
+    checkpointed, so an interrupted refresh picks up where it stopped (resume=False starts over).
+    The snapshot is only replaced once every group has been harvested.
+    """
+    print(f"Loading ACS5 {vintage} variable groups...")
+    groups_df = fetch_groups(vintage)
+    print(f"Relevant groups (tables): {len(groups_df)}")
+
+    fragments_dir = checkpoint.checkpoint_dir(vintage, snapshot_dir)
+    if not resume:
+        checkpoint.clear(fragments_dir)
+
+    # Each group is fetched once; small tables are filtered at query time (table_summary(min_variables=...))
+    # instead of by a separate pre-check pass that downloaded every group twice.
+    raw_vars_df, failed = harvest_variables(groups_df["GROUP"].tolist(), vintage, fragments_dir)
+    variables_df, tables_df = build_metadata(groups_df, raw_vars_df)
+
+    if failed:
+        # A partial harvest never replaces the snapshot; the fragments are kept so the next
+        # refresh only retries the failed groups
+        print(f"Snapshot not updated: {len(failed)} groups failed. Checkpoint kept in {fragments_dir}; "
+              "run refresh again to retry them")
+        return variables_df, tables_df
+
+    paths = write_snapshot(variables_df, tables_df, vintage, snapshot_dir)
+    print(f"Snapshot written: {len(variables_df)} variables, {len(tables_df)} tables -> {paths[0]}")
+    checkpoint.clear(fragments_dir)
+    return variables_df, tables_df
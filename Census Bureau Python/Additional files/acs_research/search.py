@@ -0,0 +1,53 @@
+"""
+Research helpers over the metadata snapshot (search, table preview, summaries).
+"""
+from .snapshot import ACS_VINTAGE, load_tables, load_variables
+
+MAX_RESULTS = 20
+RESULT_COLUMNS = ["VARIABLE", "LABEL", "concept", "table"]
+
+
+def search_variables(keyword, table_prefix=None, tract_only=False, zcta_only=False, limit=MAX_RESULTS, vintage=ACS_VINTAGE):
+    """
+    Search variables by keyword with optional filters:
+    - table_prefix: 'B', 'C', 'DP', or 'S'
+    - tract_only/zcta_only: filter by geography support
+    """
+    df = load_variables(vintage)
+    if table_prefix:
+        df = df[df["table"].str.startswith(table_prefix)]
+    if tract_only:
+        df = df[df["supports_tract"]]
+    if zcta_only:
+        df = df[df["supports_zcta"]]
+    return df[df["LABEL"].str.contains(keyword, case=False, na=False)].head(limit)[RESULT_COLUMNS]
+
+
+def preview_table(table_name, vintage=ACS_VINTAGE):
+    """
+    Return all variables for a given ACS table (e.g., 'B19013', 'DP03', 'S2701').
+    """
+    df = load_variables(vintage)
+    return df[df["table"] == table_name][RESULT_COLUMNS]
+
+
+def variables_by_type(table_type, vintage=ACS_VINTAGE):
+    """
+    Variables whose name starts with a table type prefix; table_type can be 'B', 'C', 'DP', 'S'
+    or a tuple of prefixes such as ('B', 'C') for all detailed tables.
+    """
+    df = load_variables(vintage)
+    return df[df["VARIABLE"].str.startswith(table_type)]
+
+
+def table_summary(min_variables=0, vintage=ACS_VINTAGE):
+    """Tables with their description and variable count, largest first, dropping tables below min_variables."""
+    df = load_tables(vintage)
+    df = df[df["variable_count"] >= min_variables]
+    return df.sort_values("variable_count", ascending=False)
+
+
+def prefix_summary(min_variables=0, vintage=ACS_VINTAGE):
+    """Count of tables and average/max/min variable count by table prefix."""
+    df = table_summary(min_variables, vintage)
+    return df.groupby("prefix")["variable_count"].agg(["count", "mean", "max", "min"]).reset_index()
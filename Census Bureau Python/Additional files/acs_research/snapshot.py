@@ -0,0 +1,106 @@
+"""
+Metadata snapshot storage for the research library.
+
+The snapshot is two uncompressed Feather (Arrow IPC) files per vintage:
+- acs5_{vintage}_variables.feather: one row per variable (table, VARIABLE, LABEL, concept, support flags)
+- acs5_{vintage}_tables.feather: one row per table (table, DESCRIPTION, variable_count, prefix)
+
+Files are memory-mapped (no decompression pass) and converted to pandas once per process, so
+only the first call pays the load. The package ships a snapshot seeded offline from the curated
+variable workbook; `python -m acs_research refresh` rebuilds it from the Census API.
+"""
+import os
+
+# --- Configuration ---
+ACS_VINTAGE = 2022
+SNAPSHOT_DIR = os.environ.get("ACS_RESEARCH_SNAPSHOT_DIR", os.path.join(os.path.dirname(__file__), "data"))
+COMPRESSION = "uncompressed"   # compressed buffers would have to be decoded, defeating the memory map
+ZCTA_PREFIXES = ("B", "C")   # Detailed tables are published for ZCTAs; profiles/subject tables are tract-level
+WORKBOOK_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+VARIABLES_WORKBOOK = "ACS 5yr - {vintage} vintage - All Variables.xlsx"
+TABLES_WORKBOOK = "ACS 5yr - {vintage} vintage - Filtered Tables.xlsx"
+
+_cache = {}
+
+
+def snapshot_paths(vintage=ACS_VINTAGE, snapshot_dir=None):
+    """Return the (variables, tables) snapshot file paths for a vintage."""
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    return (
+        os.path.join(snapshot_dir, f"acs5_{vintage}_variables.feather"),
+        os.path.join(snapshot_dir, f"acs5_{vintage}_tables.feather"),
+    )
+
+
+def _read(path):
+    if path not in _cache:
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Metadata snapshot not found: {path}\n"
+                "Build it once with: python -m acs_research refresh"
+            )
+        from pyarrow import feather
+        _cache[path] = feather.read_table(path, memory_map=True).to_pandas()
+    return _cache[path]
+
+
+def load_variables(vintage=ACS_VINTAGE):
+    """Variable metadata DataFrame for a vintage, loaded from the snapshot on first use."""
+    return _read(snapshot_paths(vintage)[0])
+
+
+def load_tables(vintage=ACS_VINTAGE):
+    """Table-level metadata DataFrame for a vintage, loaded from the snapshot on first use."""
+    return _read(snapshot_paths(vintage)[1])
+
+
+def build_metadata(groups_df, raw_vars_df):
+    """Shape harvested variables into the snapshot's variables and tables frames."""
+    descriptions = groups_df[["GROUP", "DESCRIPTION"]].rename(columns={"GROUP": "table"})
+
+    variables_df = raw_vars_df[["table", "VARIABLE", "LABEL"]].merge(
+        descriptions.rename(columns={"DESCRIPTION": "concept"}), on="table", how="left"
+    )
+    variables_df["supports_tract"] = True
+    variables_df["supports_zcta"] = variables_df["table"].str.startswith(ZCTA_PREFIXES)
+
+    tables_df = variables_df.groupby("table").size().reset_index(name="variable_count")
+    tables_df = tables_df.merge(descriptions, on="table", how="left")
+    tables_df["prefix"] = tables_df["table"].str.extract(r"^([A-Z]+)", expand=False)
+    tables_df = tables_df[["table", "DESCRIPTION", "variable_count", "prefix"]]
+    return variables_df, tables_df
+
+
+def seed_snapshot(vintage=ACS_VINTAGE, snapshot_dir=None, workbook_dir=WORKBOOK_DIR):
+    """
+    Build the snapshot offline from the curated workbooks (Variables_All and Tables_Filtered).
+    Descriptions are only known for the filtered tables; a refresh fills in the rest.
+    """
+    import pandas as pd
+
+    raw_vars_df = pd.read_excel(
+        os.path.join(workbook_dir, VARIABLES_WORKBOOK.format(vintage=vintage)), sheet_name="Variables_All",
+        usecols=["VARIABLE", "LABEL", "table"], dtype=str,
+    )
+    groups_df = pd.read_excel(
+        os.path.join(workbook_dir, TABLES_WORKBOOK.format(vintage=vintage)), sheet_name="Tables_Filtered",
+        usecols=["table", "DESCRIPTION"], dtype=str,
+    ).rename(columns={"table": "GROUP"})
+    variables_df, tables_df = build_metadata(groups_df, raw_vars_df)
+    paths = write_snapshot(variables_df, tables_df, vintage, snapshot_dir)
+    print(f"Snapshot seeded from workbooks: {len(variables_df)} variables, {len(tables_df)} tables -> {paths[0]}")
+    return variables_df, tables_df
+
+
+def write_snapshot(variables_df, tables_df, vintage=ACS_VINTAGE, snapshot_dir=None):
+    """Write both snapshot files atomically and drop any cached copy."""
+    from pyarrow import feather
+
+    snapshot_dir = snapshot_dir or SNAPSHOT_DIR
+    os.makedirs(snapshot_dir, exist_ok=True)
+    for df, path in zip((variables_df, tables_df), snapshot_paths(vintage, snapshot_dir)):
+        tmp_path = path + ".tmp"
+        feather.write_feather(df.reset_index(drop=True), tmp_path, compression=COMPRESSION)
+        os.replace(tmp_path, path)
+        _cache.pop(path, None)
+    return snapshot_paths(vintage, snapshot_dir)
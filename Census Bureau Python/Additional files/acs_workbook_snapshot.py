@@ -0,0 +1,125 @@
+"""
+Compiled Snapshots of the Curated ACS Workbooks
+-----------------------------------------------
+- Converts a workbook sheet (e.g. Variables_All, Tables_Filtered) into a typed Parquet snapshot
+- Each snapshot has a JSON sidecar with the source file's size, mtime and SHA-256
+- Later runs reuse the snapshot while the workbook is unchanged:
+    size + mtime match   -> reuse without reading the workbook at all
+    content hash matches -> reuse (file was touched/copied but not edited)
+    otherwise            -> parse the sheet once with explicit dtypes and rewrite the snapshot
+
+Usage:
+    from acs_workbook_snapshot import load_workbook_sheet
+    vars_df = load_workbook_sheet("ACS 5yr - 2022 vintage - All Variables.xlsx", "Variables_All")
+
+    python acs_workbook_snapshot.py   # compile the two curated workbooks next to this folder
+"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+# --- Configuration ---
+SNAPSHOT_DIR_NAME = "_metadata_snapshot"
+HASH_CHUNK_SIZE = 1 << 20
+
+# Explicit column types per sheet, so no type inference is needed when a sheet is (re)compiled
+SHEET_DTYPES = {
+    "Tables_Filtered": {"table": "string", "DESCRIPTION": "string", "variable_count": "Int64", "prefix": "string"},
+    "Tables_Curated": {"table": "string", "DESCRIPTION": "string", "variable_count": "Int64", "prefix": "string"},
+    "Variables_All": {
+        "YEAR": "Int64", "DATASET": "string", "GROUP": "string", "VARIABLE": "string", "LABEL": "string",
+        "SUGGESTED_WEIGHT": "string", "VALUES": "string", "table": "string",
+        "supports_tract": "boolean", "supports_zcta": "boolean",
+    },
+}
+
+WORKBOOKS = [
+    ("ACS 5yr - 2022 vintage - Filtered Tables.xlsx", "Tables_Filtered"),
+    ("ACS 5yr - 2022 vintage - All Variables.xlsx", "Variables_All"),
+]
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_paths(xlsx_path, sheet_name, snapshot_dir=None):
+    """Return the (parquet, sidecar json) paths of a sheet's snapshot."""
+    snapshot_dir = snapshot_dir or os.path.join(os.path.dirname(os.path.abspath(xlsx_path)), SNAPSHOT_DIR_NAME)
+    stem = os.path.splitext(os.path.basename(xlsx_path))[0]
+    base = os.path.join(snapshot_dir, f"{stem} - {sheet_name}")
+    return base + ".parquet", base + ".json"
+
+
+def _read_manifest(manifest_path):
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_manifest(manifest_path, manifest):
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def compile_sheet(xlsx_path, sheet_name, snapshot_dir=None, force=False):
+    """
+    Make sure the snapshot of one sheet is current and return its Parquet path.
+    The workbook is only parsed when it has actually changed (or force=True).
+    """
+    parquet_path, manifest_path = snapshot_paths(xlsx_path, sheet_name, snapshot_dir)
+    stat = os.stat(xlsx_path)
+    manifest = _read_manifest(manifest_path)
+    if manifest and not force and os.path.exists(parquet_path):
+        if manifest["size"] == stat.st_size and manifest["mtime_ns"] == stat.st_mtime_ns:
+            return parquet_path
+        source_hash = file_sha256(xlsx_path)
+        if manifest["sha256"] == source_hash:
+            manifest.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            _write_manifest(manifest_path, manifest)
+            return parquet_path
+    else:
+        source_hash = file_sha256(xlsx_path)
+
+    print(f"Compiling {os.path.basename(xlsx_path)} [{sheet_name}] to {parquet_path}")
+    dtypes = SHEET_DTYPES.get(sheet_name, {"table": "string"})
+    df = pd.read_excel(xlsx_path, sheet_name=sheet_name, dtype={k: v for k, v in dtypes.items() if v != "boolean"})
+    for col, dtype in dtypes.items():
+        if dtype == "boolean" and col in df.columns:
+            df[col] = df[col].astype("boolean")
+
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+    tmp_path = parquet_path + ".tmp"
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, parquet_path)
+    _write_manifest(manifest_path, {
+        "source": os.path.basename(xlsx_path),
+        "sheet": sheet_name,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": source_hash,
+        "rows": len(df),
+        "columns": {col: str(dtype) for col, dtype in df.dtypes.items()},
+    })
+    return parquet_path
+
+
+def load_workbook_sheet(xlsx_path, sheet_name, snapshot_dir=None, columns=None):
+    """Read a workbook sheet through its snapshot (compiling it first if the workbook changed)."""
+    return pd.read_parquet(compile_sheet(xlsx_path, sheet_name, snapshot_dir), columns=columns)
+
+
+if __name__ == "__main__":
+    workbook_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for file_name, sheet_name in WORKBOOKS:
+        path = compile_sheet(os.path.join(workbook_dir, file_name), sheet_name)
+        print(f"Snapshot ready: {path}")
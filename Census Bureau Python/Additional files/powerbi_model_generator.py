@@ -0,0 +1,516 @@
+"""
+Power BI Semantic Model Generator for the Lakehouse Outputs
+-----------------------------------------------------------
+- Reads the Bronze/Gold output layout (a local copy or OneLake file explorer sync of the
+  Lakehouse 'Tables' folder, and/or the acs5_{year}_{table}_{geo}.parquet extraction files)
+- Emits a model.bim (or TMDL folder) with typed columns taken from the Delta/Parquet schemas
+  and one import partition per Delta partition: per state (Bronze tract/county tables) or per
+  geo level (Gold FactACS), so Power BI can refresh partitions in parallel and each partition
+  reads only its own files
+- Every partition carries a content fingerprint annotation built from its live Delta files
+  (or the extraction fingerprint sidecar), so changed_partitions() lists only the partitions
+  that need an enhanced refresh after a new Bronze/Gold run
+- validate_model() checks the generated JSON offline against the structure of the existing
+  hand-built model.bim
+
+Usage:
+    python powerbi_model_generator.py --tables-dir ".../ACS.Lakehouse/Tables" \
+        --tables-url "https://onelake.dfs.fabric.microsoft.com/<workspace>/ACS.Lakehouse/Tables" \
+        --output "../../Census Data Power BI/ACS Lakehouse.SemanticModel"
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+import uuid
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# --- Configuration ---
+ACS_YEAR = 2022
+COMPATIBILITY_LEVEL = 1550
+CULTURE = "en-US"
+SCHEMAS = ("Gold",)                 # add "Bronze" to model the wide per-table sources as well
+TABLES_URL_PARAMETER = "LakehouseTablesUrl"
+PARQUET_FOLDER_PARAMETER = "ParquetFolder"
+DEFAULT_TABLES_URL = "https://onelake.dfs.fabric.microsoft.com/<workspace>/<lakehouse>.Lakehouse/Tables"
+EXCLUDED_COLUMNS = {"geometry", "geometry_wkt", "__index_level_0__"}
+FINGERPRINT_ANNOTATION = "ACS_ContentFingerprint"
+REFERENCE_MODEL = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "Census Data Power BI", "Census API through Power Query", "Census Data.SemanticModel", "model.bim",
+)
+LINEAGE_NAMESPACE = uuid.UUID("6f1c5e0a-3b7d-4c52-9a61-2d4e8b0f7a13")   # stable lineage tags across regenerations
+
+GEO_LEVEL_ORDER = ["state", "county", "tract", "zcta"]
+PARTITION_COLUMNS = ("state", "GeoLevel")   # Delta partition columns that become model partitions
+FILTER_ONLY_COLUMNS = {"GeoLevel"}           # used to filter the partition, not modeled (DimGeography carries it)
+GOLD_RELATIONSHIPS = [
+    (fact, key, dim, key)
+    for fact in ("FactACS", "FactACS_StateSummary", "FactACS_CountySummary")
+    for key, dim in (("GeographyKey", "DimGeography"), ("VariableKey", "DimVariable"), ("VintageKey", "DimVintage"))
+] + [("DimGeographyShape", "GeographyKey", "DimGeography", "GeographyKey")]
+ADDITIVE_COLUMN = re.compile(r"^(Estimate|[A-Z]+\d+[A-Z]*_\d+E)$")   # MOE, CV, medians of ratios are left unsummarized
+
+DELTA_TYPES = {
+    "string": "string", "long": "int64", "integer": "int64", "short": "int64", "byte": "int64",
+    "double": "double", "float": "double", "boolean": "boolean", "date": "dateTime",
+    "timestamp": "dateTime", "timestamp_ntz": "dateTime", "binary": "binary",
+}
+VALID_DATA_TYPES = {"string", "int64", "double", "decimal", "boolean", "dateTime", "binary"}
+
+
+def lineage_tag(*parts):
+    return str(uuid.uuid5(LINEAGE_NAMESPACE, "/".join(parts)))
+
+
+def _fingerprint(values):
+    return hashlib.sha256("\n".join(sorted(values)).encode("utf-8")).hexdigest()[:16]
+
+
+# --- Step 1: Read the output layout ---
+def _arrow_data_type(arrow_type):
+    if pa.types.is_integer(arrow_type):
+        return "int64"
+    if pa.types.is_floating(arrow_type):
+        return "double"
+    if pa.types.is_decimal(arrow_type):
+        return "decimal"
+    if pa.types.is_boolean(arrow_type):
+        return "boolean"
+    if pa.types.is_timestamp(arrow_type) or pa.types.is_date(arrow_type):
+        return "dateTime"
+    if pa.types.is_binary(arrow_type) or pa.types.is_large_binary(arrow_type):
+        return "binary"
+    return "string"
+
+
+def _delta_data_type(delta_type):
+    if isinstance(delta_type, str) and delta_type.startswith("decimal"):
+        return "decimal"
+    return DELTA_TYPES.get(delta_type, "string")
+
+
+def read_delta_log(table_dir):
+    """
+    Replay a Delta table's transaction log (last checkpoint + later JSON commits) and return the
+    columns, partition columns and live data files with their partition values.
+    """
+    log_dir = os.path.join(table_dir, "_delta_log")
+    metadata, files, start_version = None, {}, -1
+
+    last_checkpoint = os.path.join(log_dir, "_last_checkpoint")
+    if os.path.exists(last_checkpoint):
+        with open(last_checkpoint, "r", encoding="utf-8") as f:
+            start_version = json.load(f)["version"]
+        checkpoint = pq.read_table(os.path.join(log_dir, f"{start_version:020d}.checkpoint.parquet"), columns=["add", "metaData"])
+        for action in checkpoint.to_pylist():
+            if action["metaData"]:
+                metadata = action["metaData"]
+            if action["add"]:
+                files[action["add"]["path"]] = dict(action["add"]["partitionValues"] or [])
+
+    for commit in sorted(glob.glob(os.path.join(log_dir, "*.json"))):
+        if int(os.path.basename(commit).split(".")[0]) <= start_version:
+            continue
+        with open(commit, "r", encoding="utf-8") as f:
+            for line in f:
+                action = json.loads(line)
+                if "metaData" in action:
+                    metadata = action["metaData"]
+                elif "add" in action:
+                    files[action["add"]["path"]] = action["add"].get("partitionValues") or {}
+                elif "remove" in action:
+                    files.pop(action["remove"]["path"], None)
+
+    if metadata is None:
+        raise ValueError(f"No Delta metadata found in {log_dir}")
+    schema = json.loads(metadata["schemaString"])
+    return {
+        "columns": [(field["name"], _delta_data_type(field["type"])) for field in schema["fields"]],
+        "partition_columns": list(metadata.get("partitionColumns") or []),
+        "files": files,
+    }
+
+
+def scan_tables_dir(tables_dir, schemas=SCHEMAS):
+    """Delta tables of the selected schemas under a Lakehouse 'Tables' folder (Tables/<schema>/<table>)."""
+    sources = []
+    for schema in schemas:
+        schema_dir = os.path.join(tables_dir, schema)
+        if not os.path.isdir(schema_dir):
+            continue
+        for table_name in sorted(os.listdir(schema_dir)):
+            table_dir = os.path.join(schema_dir, table_name)
+            if not os.path.isdir(os.path.join(table_dir, "_delta_log")):
+                continue
+            log = read_delta_log(table_dir)
+            sources.append({
+                "name": table_name, "kind": "delta", "schema": schema, "path": f"{schema}/{table_name}",
+                "local_dir": table_dir, **log,
+            })
+    return sources
+
+
+def scan_parquet_dir(parquet_dir, year=ACS_YEAR):
+    """The extraction script's acs5_{year}_{table}_{geo}.parquet files, one source per file."""
+    pattern = re.compile(rf"^acs5_{year}_(.+)_({'|'.join(GEO_LEVEL_ORDER)})\.parquet$")
+    sources = []
+    for entry in sorted(os.listdir(parquet_dir)):
+        if not pattern.match(entry):
+            continue
+        path = os.path.join(parquet_dir, entry)
+        sidecar = path + ".fingerprint.json"
+        if os.path.exists(sidecar):
+            with open(sidecar, "r", encoding="utf-8") as f:
+                fingerprint = _fingerprint(f"{k}={v}" for k, v in json.load(f).items())
+        else:
+            stat = os.stat(path)
+            fingerprint = _fingerprint([str(stat.st_size), str(stat.st_mtime_ns)])
+        schema = pq.read_schema(path)
+        sources.append({
+            "name": os.path.splitext(entry)[0], "kind": "parquet", "path": entry,
+            "columns": [(field.name, _arrow_data_type(field.type)) for field in schema],
+            "partition_columns": [], "fingerprint": fingerprint,
+        })
+    return sources
+
+
+# --- Step 2: Build the model ---
+def _m_text(value):
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def _m_literal(value, data_type):
+    return str(value) if data_type in ("int64", "double", "decimal") else _m_text(value)
+
+
+def partition_expression(source, columns, row_filter=None):
+    """Power Query (M) lines of one partition: the Delta table or Parquet file, model columns, row filter."""
+    if source["kind"] == "delta":
+        location = f'{TABLES_URL_PARAMETER} & {_m_text("/" + source["path"])}'
+        read = f"DeltaLake.Table(AzureStorage.DataLake({location}, [HierarchicalNavigation = true]))"
+    else:
+        location = f'{PARQUET_FOLDER_PARAMETER} & {_m_text("/" + source["path"])}'
+        read = f"Parquet.Document(File.Contents({location}))"
+    column_list = ", ".join(_m_text(name) for name, _ in columns)
+    lines = ["let", f"    Source = {read},"]
+    rows = "Source"
+    if row_filter:
+        # Filtering on the partition column first lets DeltaLake.Table skip the other partitions' files
+        lines.append(f"    Rows = Table.SelectRows(Source, each {row_filter}),")
+        rows = "Rows"
+    lines.append(f"    Columns = Table.SelectColumns({rows}, {{{column_list}}})")
+    return lines + ["in", "    Columns"]
+
+
+def source_partitions(source):
+    """(name, row filter, fingerprint) for each partition of a source."""
+    name = source["name"]
+    if source["kind"] == "parquet":
+        return [(name, None, source["fingerprint"])]
+
+    files = source["files"]
+    column = next((c for c in PARTITION_COLUMNS if c in source["partition_columns"]), None)
+    if column is None:
+        return [(name, None, _fingerprint(files))]
+    column_type = dict(source["columns"])[column]
+    by_value = {}
+    for path, values in files.items():
+        by_value.setdefault(values.get(column), []).append(path)
+    return [
+        (f"{name}-{value}", f"[{column}] = {_m_literal(value, column_type)}", _fingerprint(paths))
+        for value, paths in sorted(by_value.items())
+    ]
+
+
+def build_table(source):
+    name = source["name"]
+    excluded = EXCLUDED_COLUMNS | (FILTER_ONLY_COLUMNS & set(source["partition_columns"]))
+    columns = [(c, t) for c, t in source["columns"] if c not in excluded]
+    model_columns = []
+    for column, data_type in columns:
+        entry = {
+            "name": column,
+            "annotations": [{"name": "SummarizationSetBy", "value": "Automatic"}],
+            "dataType": data_type,
+            "lineageTag": lineage_tag(name, column),
+            "sourceColumn": column,
+            "summarizeBy": "sum" if data_type in ("int64", "double", "decimal") and ADDITIVE_COLUMN.match(column) else "none",
+        }
+        if data_type == "int64":
+            entry["formatString"] = "0"
+        model_columns.append(entry)
+
+    partitions = [
+        {
+            "name": partition_name,
+            "annotations": [{"name": FINGERPRINT_ANNOTATION, "value": fingerprint}],
+            "mode": "import",
+            "source": {"expression": partition_expression(source, columns, row_filter), "type": "m"},
+        }
+        for partition_name, row_filter, fingerprint in source_partitions(source)
+    ]
+    return {
+        "name": name,
+        "annotations": [{"name": "PBI_ResultType", "value": "Table"}],
+        "columns": model_columns,
+        "lineageTag": lineage_tag(name),
+        "partitions": partitions,
+    }
+
+
+def _parameter(name, value):
+    return {
+        "name": name,
+        "annotations": [{"name": "PBI_ResultType", "value": "Text"}],
+        "expression": [f'{_m_text(value)} meta [IsParameterQuery=true, Type="Text", IsParameterQueryRequired=true]'],
+        "kind": "m",
+        "lineageTag": lineage_tag("expression", name),
+    }
+
+
+def build_model(sources, tables_url=DEFAULT_TABLES_URL, parquet_folder=None):
+    """Assemble the model.bim document for the scanned sources."""
+    tables = [build_table(source) for source in sources]
+
+    columns = {t["name"]: {c["name"] for c in t["columns"]} for t in tables}
+    relationships = [
+        {
+            "name": lineage_tag("relationship", from_table, from_column, to_table),
+            "fromColumn": from_column, "fromTable": from_table, "toColumn": to_column, "toTable": to_table,
+        }
+        for from_table, from_column, to_table, to_column in GOLD_RELATIONSHIPS
+        if from_column in columns.get(from_table, ()) and to_column in columns.get(to_table, ())
+    ]
+
+    expressions = []
+    if any(s["kind"] == "delta" for s in sources):
+        expressions.append(_parameter(TABLES_URL_PARAMETER, tables_url))
+    if any(s["kind"] == "parquet" for s in sources):
+        expressions.append(_parameter(PARQUET_FOLDER_PARAMETER, parquet_folder or ""))
+
+    return {
+        "compatibilityLevel": COMPATIBILITY_LEVEL,
+        "model": {
+            "annotations": [{"name": "PBI_QueryOrder", "value": json.dumps([e["name"] for e in expressions] + [t["name"] for t in tables])}],
+            "culture": CULTURE,
+            "dataAccessOptions": {"legacyRedirects": True, "returnErrorValuesAsNull": True},
+            "defaultPowerBIDataSourceVersion": "powerBI_V3",
+            "expressions": expressions,
+            "relationships": relationships,
+            "sourceQueryCulture": CULTURE,
+            "tables": tables,
+        },
+    }
+
+
+def changed_partitions(new_model, old_model):
+    """
+    Enhanced refresh objects ({"table", "partition"}) for partitions that are new or whose content
+    fingerprint changed between two generated models.
+    """
+    def fingerprints(model):
+        return {
+            (t["name"], p["name"]): {a["name"]: a["value"] for a in p.get("annotations", [])}.get(FINGERPRINT_ANNOTATION)
+            for t in model["model"]["tables"] for p in t["partitions"]
+        }
+
+    old = fingerprints(old_model) if old_model else {}
+    return [{"table": t, "partition": p} for (t, p), fp in fingerprints(new_model).items() if old.get((t, p)) != fp or fp is None]
+
+
+# --- Step 3: Offline validation against the existing model structure ---
+def _common_keys(items):
+    keys = None
+    for item in items:
+        keys = set(item) if keys is None else keys & set(item)
+    return keys or set()
+
+
+def validate_model(model, reference_path=REFERENCE_MODEL):
+    """Return a list of problems (empty if the model is consistent with itself and the reference model.bim)."""
+    with open(reference_path, "r", encoding="utf-8-sig") as f:
+        reference = json.load(f)
+    ref_tables = reference["model"]["tables"]
+    required_table = _common_keys(ref_tables) - {"annotations"}
+    required_column = _common_keys(c for t in ref_tables for c in t.get("columns", []) if "sourceColumn" in c)
+    required_partition = _common_keys(p for t in ref_tables for p in t.get("partitions", []))
+    data_types = VALID_DATA_TYPES | {c["dataType"] for t in ref_tables for c in t.get("columns", [])}
+
+    problems = []
+    if model.get("compatibilityLevel", 0) < reference["compatibilityLevel"]:
+        problems.append(f"compatibilityLevel {model.get('compatibilityLevel')} is below {reference['compatibilityLevel']}")
+    for key in ("culture", "defaultPowerBIDataSourceVersion"):
+        if model["model"].get(key) != reference["model"].get(key):
+            problems.append(f"model.{key} is {model['model'].get(key)!r}, expected {reference['model'].get(key)!r}")
+
+    parameters = {e["name"] for e in model["model"].get("expressions", [])}
+    lineage_tags = set()
+    table_columns = {}
+    for table in model["model"]["tables"]:
+        name = table.get("name")
+        if name in table_columns:
+            problems.append(f"Duplicate table {name!r}")
+        missing = required_table - set(table)
+        if missing:
+            problems.append(f"Table {name!r} is missing {sorted(missing)}")
+        column_names = [c.get("name") for c in table.get("columns", [])]
+        table_columns[name] = set(column_names)
+        if len(column_names) != len(set(column_names)):
+            problems.append(f"Table {name!r} has duplicate column names")
+
+        for column in table.get("columns", []):
+            missing = required_column - set(column)
+            if missing:
+                problems.append(f"Column {name}.{column.get('name')} is missing {sorted(missing)}")
+            if column.get("dataType") not in data_types:
+                problems.append(f"Column {name}.{column.get('name')} has unknown dataType {column.get('dataType')!r}")
+
+        partition_names = [p.get("name") for p in table.get("partitions", [])]
+        if not partition_names:
+            problems.append(f"Table {name!r} has no partitions")
+        if len(partition_names) != len(set(partition_names)):
+            problems.append(f"Table {name!r} has duplicate partition names")
+        for partition in table.get("partitions", []):
+            missing = required_partition - set(partition)
+            if missing:
+                problems.append(f"Partition {partition.get('name')!r} is missing {sorted(missing)}")
+            expression = "\n".join(partition.get("source", {}).get("expression", []))
+            used = {p for p in (TABLES_URL_PARAMETER, PARQUET_FOLDER_PARAMETER) if p in expression}
+            if used - parameters:
+                problems.append(f"Partition {partition.get('name')!r} uses undefined parameter(s) {sorted(used - parameters)}")
+            selected = set(re.findall(r'"((?:[^"]|"")*)"', expression.split("Table.SelectColumns", 1)[-1].split("}", 1)[0]))
+            if selected != set(column_names):
+                problems.append(f"Partition {partition.get('name')!r} selects columns that differ from the table columns")
+
+        for tag in [table.get("lineageTag")] + [c.get("lineageTag") for c in table.get("columns", [])]:
+            if tag in lineage_tags:
+                problems.append(f"Duplicate lineageTag {tag} in table {name!r}")
+            lineage_tags.add(tag)
+
+    for rel in model["model"].get("relationships", []):
+        for side in ("from", "to"):
+            table, column = rel.get(f"{side}Table"), rel.get(f"{side}Column")
+            if column not in table_columns.get(table, ()):
+                problems.append(f"Relationship {rel.get('name')} refers to missing column {table}.{column}")
+    return problems
+
+
+# --- Step 4: Write model.bim or TMDL ---
+def write_model_bim(model, output_dir):
+    """Write model.bim (and a definition.pbism if missing) into a .SemanticModel folder."""
+    os.makedirs(output_dir, exist_ok=True)
+    pbism = os.path.join(output_dir, "definition.pbism")
+    if not os.path.exists(pbism):
+        with open(pbism, "w", encoding="utf-8") as f:
+            json.dump({"version": "4.0", "settings": {}}, f, indent=2)
+    path = os.path.join(output_dir, "model.bim")
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(model, f, indent=2, ensure_ascii=False)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def _tmdl_name(name):
+    return name if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", name) else "'" + name.replace("'", "''") + "'"
+
+
+def _tmdl_annotations(items, indent):
+    return [f"{indent}annotation {_tmdl_name(a['name'])} = {a['value']}" for a in items]
+
+
+def table_tmdl(table):
+    lines = [f"table {_tmdl_name(table['name'])}", f"\tlineageTag: {table['lineageTag']}", ""]
+    for column in table["columns"]:
+        lines.append(f"\tcolumn {_tmdl_name(column['name'])}")
+        lines += [f"\t\t{key}: {column[key]}" for key in ("dataType", "formatString", "lineageTag", "summarizeBy", "sourceColumn") if key in column]
+        lines += [""] + _tmdl_annotations(column.get("annotations", []), "\t\t") + [""]
+    for partition in table["partitions"]:
+        lines += [f"\tpartition {_tmdl_name(partition['name'])} = m", f"\t\tmode: {partition['mode']}", "\t\tsource ="]
+        lines += [f"\t\t\t\t{line}" for line in partition["source"]["expression"]]
+        lines += [""] + _tmdl_annotations(partition.get("annotations", []), "\t\t") + [""]
+    lines += _tmdl_annotations(table.get("annotations", []), "\t")
+    return "\n".join(lines) + "\n"
+
+
+def write_tmdl(model, output_dir):
+    """Write the model as a TMDL 'definition' folder (model, expressions, relationships, one file per table)."""
+    definition = os.path.join(output_dir, "definition")
+    os.makedirs(os.path.join(definition, "tables"), exist_ok=True)
+    body = model["model"]
+    files = {
+        "database.tmdl": f"database\n\tcompatibilityLevel: {model['compatibilityLevel']}\n",
+        "model.tmdl": "\n".join([
+            "model Model",
+            f"\tculture: {body['culture']}",
+            f"\tdefaultPowerBIDataSourceVersion: {body['defaultPowerBIDataSourceVersion']}",
+            f"\tsourceQueryCulture: {body['sourceQueryCulture']}",
+            "",
+        ] + _tmdl_annotations(body.get("annotations", []), "\t")) + "\n",
+        "expressions.tmdl": "\n".join(
+            f"expression {_tmdl_name(e['name'])} = {e['expression'][0]}\n\tlineageTag: {e['lineageTag']}\n\n"
+            + "\n".join(_tmdl_annotations(e.get("annotations", []), "\t")) + "\n"
+            for e in body["expressions"]
+        ),
+        "relationships.tmdl": "\n".join(
+            f"relationship {r['name']}\n\tfromColumn: {_tmdl_name(r['fromTable'])}.{_tmdl_name(r['fromColumn'])}\n"
+            f"\ttoColumn: {_tmdl_name(r['toTable'])}.{_tmdl_name(r['toColumn'])}\n"
+            for r in body["relationships"]
+        ),
+    }
+    for file_name, text in files.items():
+        with open(os.path.join(definition, file_name), "w", encoding="utf-8") as f:
+            f.write(text)
+    for table in body["tables"]:
+        with open(os.path.join(definition, "tables", f"{table['name']}.tmdl"), "w", encoding="utf-8") as f:
+            f.write(table_tmdl(table))
+    return definition
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a partitioned Power BI semantic model from the Bronze/Gold outputs.")
+    parser.add_argument("--tables-dir", help="Local copy/sync of the Lakehouse 'Tables' folder")
+    parser.add_argument("--schemas", nargs="+", default=list(SCHEMAS), help="Lakehouse schemas to model (e.g. Gold Bronze)")
+    parser.add_argument("--tables-url", default=DEFAULT_TABLES_URL, help="OneLake URL of the 'Tables' folder used by the partitions")
+    parser.add_argument("--parquet-dir", help="Folder with acs5_{year}_{table}_{geo}.parquet extraction files")
+    parser.add_argument("--parquet-folder", help="Folder path Power BI reads the Parquet files from (defaults to --parquet-dir)")
+    parser.add_argument("--output", required=True, help="Output .SemanticModel folder")
+    parser.add_argument("--format", choices=("bim", "tmdl"), default="bim")
+    parser.add_argument("--reference", default=REFERENCE_MODEL, help="Existing model.bim to validate the structure against")
+    parser.add_argument("--refresh-plan", help="Write the enhanced refresh objects of changed partitions to this JSON file")
+    parser.add_argument("--previous", help="Previously generated model.bim to compare fingerprints with (default: the one in --output)")
+    args = parser.parse_args()
+
+    sources = []
+    if args.tables_dir:
+        sources += scan_tables_dir(args.tables_dir, args.schemas)
+    if args.parquet_dir:
+        sources += scan_parquet_dir(args.parquet_dir)
+    if not sources:
+        parser.error("No Delta tables or Parquet files found; give --tables-dir and/or --parquet-dir.")
+
+    model = build_model(sources, args.tables_url, args.parquet_folder or (os.path.abspath(args.parquet_dir) if args.parquet_dir else None))
+    problems = validate_model(model, args.reference)
+    for problem in problems:
+        print(f"Validation: {problem}")
+    if problems:
+        raise SystemExit(1)
+
+    previous = None
+    previous_path = args.previous or os.path.join(args.output, "model.bim")
+    if os.path.exists(previous_path):
+        with open(previous_path, "r", encoding="utf-8-sig") as f:
+            previous = json.load(f)
+    refresh_objects = changed_partitions(model, previous)
+
+    written = write_tmdl(model, args.output) if args.format == "tmdl" else write_model_bim(model, args.output)
+    if args.refresh_plan:
+        with open(args.refresh_plan, "w", encoding="utf-8") as f:
+            json.dump({"type": "full", "objects": refresh_objects}, f, indent=2)
+        print(f"{len(refresh_objects)} partitions to refresh written to {args.refresh_plan}")
+    partitions = sum(len(t["partitions"]) for t in model["model"]["tables"])
+    print(f"Wrote {len(model['model']['tables'])} tables with {partitions} partitions to {written}")